@@ -0,0 +1,112 @@
+import glob
+import io
+import os
+import time
+import joblib
+import pandas as pd
+from collections import Counter
+from contextlib import redirect_stdout
+from pathlib import Path
+from joblib import Parallel, delayed
+
+from stock_predict import load_candles, create_features, feature_columns, fit_and_evaluate
+
+
+def resolve_batch_files(pattern):
+    # A directory means every CSV directly inside it; anything else is treated as a glob.
+    p = Path(pattern)
+    if p.is_dir():
+        files = sorted(p.glob('*.csv'))
+    else:
+        files = sorted(Path(f) for f in glob.glob(pattern))
+    return [f for f in files if f.is_file()]
+
+
+def model_names(files):
+    # Model (and results row) name per file: the file stem, unless a glob spanning
+    # directories matched several files with the same stem (data/*/BTC.csv); those are
+    # named by their path below the common directory, e.g. binance__BTC.
+    stems = Counter(f.stem for f in files)
+    root = Path(os.path.commonpath([str(f.resolve().parent) for f in files]))
+    names = {}
+    for f in files:
+        if stems[f.stem] == 1:
+            names[f] = f.stem
+        else:
+            names[f] = '__'.join(f.resolve().relative_to(root).with_suffix('').parts)
+    return names
+
+
+def plan_cores(n_files, n_jobs):
+    # Split one core budget between symbol workers and the trees inside each forest,
+    # so workers x forest threads never exceeds the budget.
+    budget = n_jobs if n_jobs > 0 else os.cpu_count() or 1
+    workers = max(1, min(n_files, budget))
+    return workers, max(1, budget // workers)
+
+
+def train_symbol(path, out_dir, lags, test_size, rf_jobs, cache_dir=None, symbol=None):
+    symbol = symbol or path.stem
+    row = {'symbol': symbol, 'file': str(path), 'status': 'ok', 'error': None, 'rows': None,
+           'rmse': None, 'directional_accuracy': None, 'correct': None, 'total': None,
+           'train_seconds': None, 'model_path': None}
+    start = time.perf_counter()
+    try:
+        # load_candles prints the reason before exiting on malformed files; keep it for the row
+        with redirect_stdout(io.StringIO()) as out:
+            df, _ = load_candles(path, cache_dir=cache_dir)
+        df_feat = create_features(df, lags=lags)
+        X = df_feat[feature_columns(lags)].values
+        y = df_feat['target_next'].values
+        res = fit_and_evaluate(df_feat, X, y, test_size, n_jobs=rf_jobs)
+    except (SystemExit, Exception) as e:
+        # one bad symbol must not sink the batch
+        if isinstance(e, SystemExit):
+            row['error'] = out.getvalue().strip() or f"exited with status {e.code}"
+        else:
+            row['error'] = f"{type(e).__name__}: {e}"
+        row['status'] = 'failed'
+        print(f"{symbol}: {row['error']}")
+        return row
+
+    model_path = Path(out_dir) / f'{symbol}.joblib'
+    joblib.dump(res['model'], model_path)
+    row.update({
+        'rows': len(df_feat),
+        'rmse': res['rmse'],
+        'directional_accuracy': res['directional_accuracy'] * 100,
+        'correct': int(res['correct']),
+        'total': int(res['total']),
+        'train_seconds': time.perf_counter() - start,
+        'model_path': str(model_path),
+    })
+    return row
+
+
+def run_batch(args):
+    files = resolve_batch_files(args.batch)
+    if not files:
+        print(f"No CSV files matched: {args.batch}")
+        raise SystemExit(2)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    names = model_names(files)
+    workers, rf_jobs = plan_cores(len(files), args.n_jobs)
+    print(f"Training {len(files)} symbols on {workers} workers x {rf_jobs} forest threads...")
+
+    rows = Parallel(n_jobs=workers)(
+        delayed(train_symbol)(f, out_dir, args.lags, args.test_size, rf_jobs, args.cache_dir, names[f])
+        for f in files
+    )
+
+    results = pd.DataFrame(rows)
+    results_path = out_dir / 'results.csv'
+    results.to_csv(results_path, index=False)
+
+    print("\nBatch Results:")
+    print(results[['symbol', 'status', 'rows', 'rmse', 'directional_accuracy', 'error']].fillna({'error': ''})
+          .to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    ok = results[results['status'] == 'ok']
+    print(f"\n{len(ok)}/{len(results)} symbols trained. Results saved to: {results_path}")
+    return results
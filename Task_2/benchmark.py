@@ -0,0 +1,229 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from stock_predict import (load_candles, create_features, feature_columns, build_model,
+                           directional_accuracy, plot_predictions)
+
+STAGES = ['csv', 'features', 'fit', 'predict', 'plot']
+
+
+def make_candles(n, seed=0, freq='1min', start='2020-01-01'):
+    # Synthetic OHLCV in the CoinMarketCap layout: a geometric random walk for close,
+    # open = previous close, high/low around both, log-normal volume.
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.001, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(16, 1, n)
+    time_open = pd.date_range(start, periods=n, freq=freq, tz='UTC')
+    time_close = time_open + pd.Timedelta(freq) - pd.Timedelta('1ms')
+    fmt = '%Y-%m-%dT%H:%M:%S.%fZ'
+    return pd.DataFrame({
+        'timeOpen': time_open.strftime(fmt).str[:-4] + 'Z',
+        'timeClose': time_close.strftime(fmt).str[:-4] + 'Z',
+        'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+        'timestamp': time_close.strftime(fmt).str[:-4] + 'Z',
+    })
+
+
+def stage_csv(path):
+    return load_candles(path)
+
+
+def stage_features(df, lags):
+    df_feat = create_features(df, lags=lags)
+    return df_feat, df_feat[feature_columns(lags)].values, df_feat['target_next'].values
+
+
+def stage_fit(X, y, n_jobs):
+    model = build_model(n_jobs=n_jobs)
+    model.fit(X, y)
+    return model
+
+
+def stage_predict(model, X):
+    return model.predict(X)
+
+
+def stage_plot(dates, y_test, y_pred, acc_pct, out_plot):
+    plot_predictions(dates, y_test, y_pred, acc_pct, out_plot)
+
+
+STAGE_FUNCS = {'csv': stage_csv, 'features': stage_features, 'fit': stage_fit,
+               'predict': stage_predict, 'plot': stage_plot}
+
+
+def rss_mb():
+    # (current RSS, peak RSS) of this process in MB. On Linux the peak is the address
+    # space's high-water mark from /proc, which starts fresh in a spawned process and can
+    # be reset; elsewhere ru_maxrss (KiB on Linux, bytes on macOS), which on Linux would
+    # also carry the parent's peak across fork and exec.
+    try:
+        with open('/proc/self/status') as f:
+            fields = dict(line.split(':', 1) for line in f if line.startswith(('VmRSS', 'VmHWM')))
+        return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+        return peak, peak
+
+
+def reset_peak_rss():
+    # "5" resets the high-water mark to the current RSS (Linux 4.0+)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def measure_stage_rss(stage, input_path):
+    # Runs in a fresh process holding only this stage's inputs: returns the process's
+    # peak RSS and how far the stage pushed it above the RSS after loading the inputs.
+    # RSS covers native buffers (tree nodes, the C CSV parser, the Agg canvas) that
+    # Python-level allocation tracing misses.
+    inputs = joblib.load(input_path)
+    gc.collect()
+    reset_peak_rss()
+    before, _ = rss_mb()
+    STAGE_FUNCS[stage](**inputs)
+    _, peak = rss_mb()
+    return peak, peak - before
+
+
+class StageRunner:
+    # Each stage is timed in-process without any instrumentation. With memory on, its
+    # inputs are then saved and the stage is re-run in a fresh spawned process to
+    # measure peak RSS, so the memory probe never skews the timing.
+    def __init__(self, results, rows, selected, workdir, memory=True):
+        self.results = results
+        self.rows = rows
+        self.selected = selected
+        self.workdir = Path(workdir)
+        self.memory = memory
+
+    def run(self, stage, **inputs):
+        start = time.perf_counter()
+        out = STAGE_FUNCS[stage](**inputs)
+        seconds = time.perf_counter() - start
+        if stage not in self.selected:
+            return out
+        row = {'rows': self.rows, 'stage': stage, 'seconds': seconds,
+               'peak_rss_mb': None, 'stage_rss_mb': None}
+        if self.memory:
+            input_path = self.workdir / f'{stage}_input.joblib'
+            joblib.dump(inputs, input_path)
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                row['peak_rss_mb'], row['stage_rss_mb'] = pool.submit(measure_stage_rss, stage, input_path).result()
+            input_path.unlink()
+            print(f"  {stage:<9} {seconds:10.3f}s {row['peak_rss_mb']:10.1f} MB peak RSS "
+                  f"(+{row['stage_rss_mb']:.1f} MB in stage)", flush=True)
+        else:
+            print(f"  {stage:<9} {seconds:10.3f}s", flush=True)
+        self.results.append(row)
+        return out
+
+
+def run_size(n, args, results, workdir):
+    # The same stages stock_predict.main runs, on n synthetic candles.
+    stages = set(args.stages.split(','))
+    runner = StageRunner(results, n, stages, workdir, memory=not args.no_memory)
+    print(f"{n} rows")
+    csv_path = Path(workdir) / f'candles_{n}.csv'
+    make_candles(n, seed=args.seed).to_csv(csv_path, sep=';', index=False)
+
+    df, date_col = runner.run('csv', path=csv_path)
+    csv_path.unlink()
+
+    df_feat, X, y = runner.run('features', df=df, lags=args.lags)
+    if not stages & {'fit', 'predict', 'plot'}:
+        return
+    train_n = len(X) - int(np.floor(args.test_size * len(X)))
+    model = runner.run('fit', X=X[:train_n], y=y[:train_n], n_jobs=args.n_jobs)
+    y_pred = runner.run('predict', model=model, X=X[train_n:])
+
+    if 'plot' in stages:
+        y_test = y[train_n:]
+        acc, _, _ = directional_accuracy(df_feat['close'].values[train_n:], y_pred, y_test)
+        runner.run('plot', dates=df_feat[date_col].values[train_n:], y_test=y_test, y_pred=y_pred,
+                   acc_pct=acc * 100, out_plot=Path(workdir) / 'plot.png')
+
+
+def compare(results, baseline_path, tolerance):
+    # Lists (rows, stage) pairs that got slower or hungrier than the baseline by more than tolerance.
+    baseline = json.loads(Path(baseline_path).read_text())
+    base = {(r['rows'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        b = base.get((r['rows'], r['stage']))
+        if not b:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if b.get(metric) and r.get(metric) is not None and r[metric] > b[metric] * (1 + tolerance):
+                regressions.append((r['rows'], r['stage'], metric, b[metric], r[metric]))
+    return regressions
+
+
+def main(args):
+    sizes = [int(float(s)) for s in args.sizes.split(',')]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            run_size(n, args, results, workdir)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count(),
+            'machine': platform.machine(),
+            'lags': args.lags,
+            'n_jobs': args.n_jobs,
+        },
+        'results': results,
+    }
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Benchmark results saved to: {out}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for rows, stage, metric, before, after in regressions:
+            print(f"REGRESSION {rows} rows / {stage}: {metric} {before:.3f} -> {after:.3f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the stock_predict stages")
+    parser.add_argument("--sizes", default="1e3,1e4,1e5,1e6", help="Comma-separated row counts (up to 1e7)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to time")
+    parser.add_argument("--lags", type=int, default=5, help="Number of lag features")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Fraction of rows used for predict/plot")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="RandomForest n_jobs")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    parser.add_argument("--output", default="benchmarks/results.json", help="JSON results file")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to check for regressions")
+    parser.add_argument("--no-memory", action="store_true", help="Only time the stages (skip the peak RSS runs)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown/memory growth before flagging")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+CACHE_VERSION = 1
+CANDLE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class CandleCache:
+    # Columnar cache of parsed candle CSVs. Each entry is a directory named after the
+    # content hash of the source file holding one .npy file per column, so later runs
+    # (and worker processes) memory-map the arrays instead of parsing text again.
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def key(self, data_path, chunk_size=1 << 20):
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"v{CACHE_VERSION}".encode())
+        with open(data_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def load(self, key):
+        # Returns (df, date_col) backed by read-only memory maps, or None on a miss.
+        entry = self.cache_dir / key
+        meta_path = entry / 'meta.json'
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        date_col = meta['date_col']
+        columns = {}
+        ts = np.load(entry / 'timestamps.npy', mmap_mode='r')
+        dates = pd.Series(ts, copy=False)
+        if meta['tz']:
+            dates = dates.dt.tz_localize(meta['tz'])
+        columns[date_col] = dates
+        for col in meta['columns']:
+            columns[col] = np.load(entry / f'{col}.npy', mmap_mode='r')
+        return pd.DataFrame(columns, copy=False), date_col
+
+    def store(self, key, df, date_col):
+        entry = self.cache_dir / key
+        if (entry / 'meta.json').exists():
+            return entry
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # write into a scratch directory and rename, so readers never see half an entry
+        tmp = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=f'.{key}.'))
+        try:
+            dates = df[date_col]
+            tz = str(dates.dt.tz) if dates.dt.tz is not None else None
+            if tz:
+                dates = dates.dt.tz_convert(None)
+            np.save(tmp / 'timestamps.npy', dates.to_numpy())
+            columns = [c for c in CANDLE_COLUMNS if c in df.columns]
+            for col in columns:
+                np.save(tmp / f'{col}.npy', df[col].to_numpy(dtype=np.float64))
+            meta = {'version': CACHE_VERSION, 'date_col': date_col, 'tz': tz,
+                    'columns': columns, 'rows': len(df)}
+            (tmp / 'meta.json').write_text(json.dumps(meta))
+            os.replace(tmp, entry)
+        except OSError:
+            # another process may have published the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not (entry / 'meta.json').exists():
+                raise
+        return entry
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class CompiledForest:
+    # Flattens a fitted StandardScaler + RandomForestRegressor pipeline into plain NumPy
+    # node arrays. All trees are walked together one level per step, so a single row or a
+    # micro-batch costs max_depth vectorized gathers instead of a trip through sklearn's
+    # input validation and per-tree joblib dispatch.
+    def __init__(self, pipeline):
+        scaler = pipeline.named_steps['scaler']
+        forest = pipeline.named_steps['rf']
+        self.n_features = scaler.n_features_in_
+        self.mean = scaler.mean_ if scaler.with_mean else np.zeros(self.n_features)
+        self.scale = scaler.scale_ if scaler.with_std else np.ones(self.n_features)
+
+        trees = [est.tree_ for est in forest.estimators_]
+        self.n_trees = len(trees)
+        sizes = np.array([t.node_count for t in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        self.roots = offsets.astype(np.intp)
+
+        left, right, feature, threshold, value = [], [], [], [], []
+        for tree, off in zip(trees, offsets):
+            is_leaf = tree.children_left == -1
+            nodes = np.arange(tree.node_count) + off
+            # leaves point at themselves, so walking past a shallow leaf is a no-op
+            left.append(np.where(is_leaf, nodes, tree.children_left + off))
+            right.append(np.where(is_leaf, nodes, tree.children_right + off))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            value.append(tree.value[:, 0, 0])
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = np.stack([np.concatenate(left), np.concatenate(right)], axis=1).ravel().astype(np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.depth = max(t.max_depth for t in trees)
+
+    def _scale(self, X):
+        # sklearn trees compare float32 features against float64 thresholds
+        return ((X - self.mean) / self.scale).astype(np.float32)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        Xs = self._scale(X)
+        # flat (row, feature) offsets let one gather serve the whole batch
+        flat = Xs.ravel()
+        base = (np.arange(len(Xs)) * self.n_features)[:, None]
+        idx = np.tile(self.roots, (len(Xs), 1))
+        for _ in range(self.depth):
+            go_right = flat[base + self.feature[idx]] > self.threshold[idx]
+            idx = self.children[2 * idx + go_right]
+        # sequential accumulation in tree order, like the forest's own averaging loop
+        return np.cumsum(self.value[idx], axis=1)[:, -1] / self.n_trees
+
+    def predict_one(self, row):
+        # single-row fast path: 1-D gathers only
+        x = self._scale(np.asarray(row, dtype=np.float64))
+        idx = self.roots
+        for _ in range(self.depth):
+            idx = self.children[2 * idx + (x[self.feature[idx]] > self.threshold[idx])]
+        return float(np.cumsum(self.value[idx])[-1] / self.n_trees)
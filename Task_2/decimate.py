@@ -0,0 +1,67 @@
+import numpy as np
+
+
+def _as_numeric(x):
+    # datetime64 x values are decimated on their integer ticks and converted back afterwards
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.view(np.int64).astype(np.float64), x.dtype
+    return x.astype(np.float64), None
+
+
+def _restore(x, dtype):
+    return x.astype(np.int64).view(dtype) if dtype is not None else x
+
+
+def minmax_indices(y, n_out):
+    # Indices of the min and max point of each of n_out // 2 equal buckets, in order.
+    # Keeps every spike visible and runs in a single vectorized pass.
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    width = -(-n // buckets)
+    rows = -(-n // width)
+    padded = np.full(rows * width, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(rows, width)
+    # nan-padding only ever fills the tail of the last bucket, which always holds real points
+    lo = np.nanargmin(grid, axis=1)
+    hi = np.nanargmax(grid, axis=1)
+    base = np.arange(rows) * width
+    idx = np.sort(np.stack([base + lo, base + hi], axis=1), axis=1).ravel()
+    return np.unique(idx)
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: per bucket keep the point forming the largest
+    # triangle with the previously kept point and the next bucket's average.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        nxt_end = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = x[end:nxt_end].mean() if nxt_end > end else x[-1]
+        avg_y = y[end:nxt_end].mean() if nxt_end > end else y[-1]
+        area = np.abs((x[prev] - avg_x) * (y[start:end] - y[prev])
+                      - (x[prev] - x[start:end]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        idx[b + 1] = prev
+    return idx
+
+
+def decimate(x, y, n_out, method='minmax'):
+    # Shape-preserving downsample of one series to about n_out points; short series pass through.
+    if len(y) <= n_out or n_out < 3:
+        return np.asarray(x), np.asarray(y)
+    xn, _ = _as_numeric(x)
+    if method == 'lttb':
+        idx = lttb_indices(xn, y, n_out)
+    else:
+        idx = minmax_indices(y, n_out)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
@@ -0,0 +1,163 @@
+import math
+import numpy as np
+
+
+class RingBuffer:
+    # Fixed-size FIFO over a preallocated array; push returns the evicted value (or None).
+    def __init__(self, size):
+        self.size = size
+        self.buf = [0.0] * size
+        self.head = 0
+        self.count = 0
+
+    def push(self, value):
+        evicted = None
+        if self.count == self.size:
+            evicted = self.buf[self.head]
+        else:
+            self.count += 1
+        self.buf[self.head] = value
+        self.head = (self.head + 1) % self.size
+        return evicted
+
+    def get(self, back):
+        # back=1 is the most recently pushed value
+        return self.buf[(self.head - back) % self.size]
+
+    def full(self):
+        return self.count == self.size
+
+
+class RollingMean:
+    # Running-sum window mean that mirrors pandas' roll_mean kernel step for step
+    # (Kahan-compensated add/remove sums, same-value and sign corrections), so the
+    # streamed value is bit-identical to Series.rolling(window).mean().
+    def __init__(self, window):
+        self.window = window
+        self.values = RingBuffer(window)
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.prev_value = 0.0
+        self.same_ct = 0
+
+    def _add(self, val):
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.same_ct += 1
+        else:
+            self.same_ct = 1
+        self.prev_value = val
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.comp_remove
+        t = self.sum_x + y
+        self.comp_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def push(self, val):
+        val = float(val)
+        if self.window == 1 or self.values.count == 0:
+            # pandas restarts the accumulator whenever the new window does not overlap the old one
+            self.nobs = self.neg_ct = self.same_ct = 0
+            self.sum_x = self.comp_add = self.comp_remove = 0.0
+            self.prev_value = val
+        evicted = self.values.push(val)
+        if evicted is not None and self.window > 1:
+            self._remove(evicted)
+        self._add(val)
+
+    def mean(self):
+        # min_periods defaults to the window length
+        if self.nobs < self.window or self.nobs == 0:
+            return np.nan
+        result = self.sum_x / self.nobs
+        if self.same_ct >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class IncrementalFeatures:
+    # Streaming counterpart of stock_predict.create_features: every update() costs O(1)
+    # regardless of history length and yields the same feature row as the pandas path.
+    def __init__(self, lags=5):
+        self.lags = lags
+        self.short_window = min(3, lags)
+        self.medium_window = min(7, lags * 2)
+        self.closes = RingBuffer(lags)
+        self.ma_short = RollingMean(self.short_window)
+        self.ma_medium = RollingMean(self.medium_window)
+        self.vol_rolling = RollingMean(self.medium_window)
+        self.n_seen = 0
+
+    @property
+    def feature_names(self):
+        # same column order main() uses to build X
+        return [f'lag_{lag}' for lag in range(1, self.lags + 1)] + [
+            'ret_1', 'ma_short', 'ma_medium', 'vol_rolling'
+        ]
+
+    @property
+    def warmup(self):
+        # candles that must precede the first complete feature row
+        return max(self.lags, self.medium_window)
+
+    def update(self, close, volume):
+        # Fold in one candle and return the feature vector used to predict the next
+        # close, or None while the windows are still warming up.
+        close = float(close)
+        volume = float(volume)
+        row = None
+        if self.n_seen >= self.warmup:
+            prev_close = self.closes.get(1)
+            row = np.empty(self.lags + 4)
+            for lag in range(1, self.lags + 1):
+                row[lag - 1] = self.closes.get(lag)
+            row[self.lags] = close / prev_close - 1
+            # the rolling means still cover candles up to t-1, i.e. pandas' .shift(1)
+            row[self.lags + 1] = self.ma_short.mean()
+            row[self.lags + 2] = self.ma_medium.mean()
+            row[self.lags + 3] = self.vol_rolling.mean()
+            if np.isnan(row).any():
+                row = None
+        self.closes.push(close)
+        self.ma_short.push(close)
+        self.ma_medium.push(close)
+        self.vol_rolling.push(volume)
+        self.n_seen += 1
+        return row
+
+    def warm(self, closes, volumes):
+        # Replay a history (oldest first) and return the feature row of the last candle.
+        row = None
+        for close, volume in zip(closes, volumes):
+            row = self.update(close, volume)
+        return row
+
+    def transform(self, closes, volumes):
+        # Batch helper: stacked feature rows for every candle that has one.
+        # create_features additionally drops the final candle, whose target is unknown.
+        rows = [self.update(c, v) for c, v in zip(closes, volumes)]
+        rows = [r for r in rows if r is not None]
+        if not rows:
+            return np.empty((0, self.lags + 4))
+        return np.vstack(rows)
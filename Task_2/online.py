@@ -0,0 +1,174 @@
+import math
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.metrics import mean_squared_error
+
+from feature_engine import IncrementalFeatures
+from stock_predict import (load_candles, create_features, feature_columns, build_model,
+                           directional_accuracy)
+
+
+class OnlineForest:
+    # Keeps a fixed-size sliding window of training rows and a forest fitted on it.
+    # Each update folds in only the new candles and replaces the oldest trees with
+    # trees grown on the current window, so retraining cost depends on the window
+    # and the number of new rows, never on the full history length.
+    def __init__(self, lags=5, window=2000, n_estimators=200, max_depth=8):
+        self.lags = lags
+        self.window = window
+        self.engine = IncrementalFeatures(lags=lags)
+        self.pending = None
+        self.X = np.empty((0, lags + 4))
+        self.y = np.empty(0)
+        self.model = build_model(n_estimators=n_estimators, max_depth=max_depth)
+        self.fitted = False
+        self.last_ts = None
+        self.new_rows = 0
+        self.updates = 0
+
+    def ingest(self, dates, closes, volumes):
+        # Feed candles (oldest first); a candle's feature row becomes a training row once the next close is known.
+        rows, targets = [], []
+        for ts, close, volume in zip(dates, closes, volumes):
+            if self.last_ts is not None and ts <= self.last_ts:
+                continue
+            if self.pending is not None:
+                rows.append(self.pending)
+                targets.append(float(close))
+            self.pending = self.engine.update(close, volume)
+            self.last_ts = ts
+        if rows:
+            self.X = np.vstack([self.X, rows])[-self.window:]
+            self.y = np.concatenate([self.y, targets])[-self.window:]
+            self.new_rows += len(rows)
+        return len(rows)
+
+    def update(self):
+        # Returns the number of trees (re)built.
+        if len(self.y) == 0:
+            return 0
+        scaler = self.model.named_steps['scaler']
+        rf = self.model.named_steps['rf']
+        if not self.fitted:
+            self.model.fit(self.X, self.y)
+            self.fitted = True
+            self.new_rows = 0
+            return rf.n_estimators
+        if self.new_rows == 0:
+            return 0
+        # replace a share of the forest proportional to how much of the current window is
+        # new (the window may still be filling); the scaler stays frozen so the surviving
+        # trees' thresholds remain valid
+        n_trees = rf.n_estimators
+        k = min(n_trees, max(1, int(math.ceil(n_trees * self.new_rows / len(self.y)))))
+        self.updates += 1
+        rf.estimators_ = rf.estimators_[k:]
+        rf.warm_start = True
+        rf.random_state = 42 + self.updates
+        rf.fit(scaler.transform(self.X), self.y)
+        rf.warm_start = False
+        self.new_rows = 0
+        return k
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+def evaluate(y_true, y_pred, current_close):
+    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
+    acc, correct, total = directional_accuracy(current_close, y_pred, y_true)
+    return rmse, acc * 100, correct, total
+
+
+def compare_with_refit(df, date_col, args):
+    # Replays the test portion in chunks of --update-every candles: each chunk is first
+    # predicted by the online forest, by a forest refit from scratch on all history (what
+    # main does) and by one refit on the online model's window, then folded in. Reports
+    # accuracy and retraining time for all three.
+    df_feat = create_features(df, lags=args.lags)
+    X = df_feat[feature_columns(args.lags)].values
+    y = df_feat['target_next'].values
+    close = df_feat['close'].values
+    n = len(df_feat)
+    train_n = n - int(np.floor(args.test_size * n))
+    # feature row i belongs to candle i + offset of the raw frame
+    offset = len(df) - 1 - n
+
+    online = OnlineForest(lags=args.lags, window=args.online_window)
+    first = train_n + offset + 1
+    online.ingest(df[date_col].values[:first], df['close'].values[:first], df['volume'].values[:first])
+    online.update()
+
+    online_pred, refit_pred, window_pred = [], [], []
+    online_secs = refit_secs = window_secs = 0.0
+    step = max(1, args.update_every)
+    for start in range(train_n, n, step):
+        end = min(n, start + step)
+        online_pred.append(online.predict(X[start:end]))
+
+        refit = build_model()
+        t0 = time.perf_counter()
+        refit.fit(X[:start], y[:start])
+        refit_secs += time.perf_counter() - t0
+        refit_pred.append(refit.predict(X[start:end]))
+
+        lo = max(0, start - args.online_window)
+        window_refit = build_model()
+        t0 = time.perf_counter()
+        window_refit.fit(X[lo:start], y[lo:start])
+        window_secs += time.perf_counter() - t0
+        window_pred.append(window_refit.predict(X[start:end]))
+
+        raw = slice(start + offset + 1, end + offset + 1)
+        online.ingest(df[date_col].values[raw], df['close'].values[raw], df['volume'].values[raw])
+        t0 = time.perf_counter()
+        online.update()
+        online_secs += time.perf_counter() - t0
+
+    y_test, close_test = y[train_n:], close[train_n:]
+    report = pd.DataFrame([
+        ('online', *evaluate(y_test, np.concatenate(online_pred), close_test), online_secs),
+        ('full refit', *evaluate(y_test, np.concatenate(refit_pred), close_test), refit_secs),
+        ('window refit', *evaluate(y_test, np.concatenate(window_pred), close_test), window_secs),
+    ], columns=['mode', 'rmse', 'directional_accuracy', 'correct', 'total', 'train_seconds'])
+    print(f"\nOnline vs full refit ({n - train_n} test rows, update every {step}, "
+          f"window {args.online_window}):")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    return report
+
+
+def run_online(args):
+    df, date_col = load_candles(args.data, cache_dir=args.cache_dir)
+    if args.compare_refit:
+        return compare_with_refit(df, date_col, args)
+
+    state_path = Path(args.online)
+    if state_path.exists():
+        online = OnlineForest.load(state_path)
+        if online.lags != args.lags:
+            print(f"Online state was built with lags={online.lags}; ignoring --lags {args.lags}.")
+    else:
+        online = OnlineForest(lags=args.lags, window=args.online_window)
+
+    t0 = time.perf_counter()
+    added = online.ingest(df[date_col].values, df['close'].values, df['volume'].values)
+    trees = online.update()
+    elapsed = time.perf_counter() - t0
+    print(f"Folded in {added} new rows, rebuilt {trees} trees in {elapsed:.2f}s "
+          f"(window {len(online.y)}/{online.window} rows).")
+
+    if online.pending is not None and online.fitted:
+        print(f"Predicted next close: {online.predict(online.pending[None, :])[0]:.4f}")
+    online.save(state_path)
+    print(f"Online state saved to: {state_path}")
+    return online
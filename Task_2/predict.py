@@ -0,0 +1,73 @@
+import argparse
+import sys
+import time
+import joblib
+import numpy as np
+
+from compiled_model import CompiledForest
+from feature_engine import IncrementalFeatures
+from stock_predict import load_candles
+
+
+def load_predictor(model_path):
+    # Returns the compiled forest plus the lag count it was trained with (lags + 4 features).
+    pipeline = joblib.load(model_path)
+    compiled = CompiledForest(pipeline)
+    return pipeline, compiled, compiled.n_features - 4
+
+
+def serve_stdin(compiled, engine):
+    # One "close,volume" candle per line in, one predicted next close per line out.
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        close, volume = (float(v) for v in line.replace(';', ',').split(',')[:2])
+        row = engine.update(close, volume)
+        if row is None:
+            print("warming up", flush=True)
+            continue
+        print(f"{compiled.predict_one(row):.4f}", flush=True)
+
+
+def main(args):
+    pipeline, compiled, lags = load_predictor(args.model)
+    engine = IncrementalFeatures(lags=lags)
+
+    if args.data:
+        df, _ = load_candles(args.data, cache_dir=args.cache_dir)
+        X = engine.transform(df['close'].values, df['volume'].values)
+        if len(X) == 0:
+            print("Not enough candles to build a feature row.")
+            sys.exit(2)
+        pred = compiled.predict(X)
+        print(f"Predicted next close: {pred[-1]:.4f}")
+
+        if args.check:
+            ref = pipeline.predict(X)
+            print(f"Max abs difference vs sklearn over {len(X)} rows: {np.abs(pred - ref).max():.3e}")
+            row = X[-1]
+            n = 1000
+            start = time.perf_counter()
+            for _ in range(n):
+                compiled.predict_one(row)
+            compiled_us = (time.perf_counter() - start) / n * 1e6
+            start = time.perf_counter()
+            for _ in range(n // 10):
+                pipeline.predict(row[None, :])
+            sklearn_us = (time.perf_counter() - start) / (n // 10) * 1e6
+            print(f"Single-row latency: compiled {compiled_us:.1f} us, sklearn {sklearn_us:.1f} us")
+
+    if args.stdin:
+        serve_stdin(compiled, engine)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Low-latency next-close prediction from a saved model")
+    parser.add_argument("--model", required=True, help="Model saved with stock_predict.py --save-model")
+    parser.add_argument("--data", type=str, default=None, help="CSV history used to warm up the features")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Directory for the memory-mapped parsed-CSV cache")
+    parser.add_argument("--stdin", action="store_true", help="Serve live 'close,volume' candles from stdin")
+    parser.add_argument("--check", action="store_true", help="Compare against sklearn predictions and time both")
+    args = parser.parse_args()
+    main(args)
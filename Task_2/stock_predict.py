@@ -10,6 +10,9 @@ from sklearn.metrics import mean_squared_error
 import joblib
 import sys
 
+from candle_cache import CandleCache
+from decimate import decimate
+
 def create_features(df, lags=5):
     df_feat = df.copy().reset_index(drop=True)
     df_feat['close'] = df_feat['close'].astype(float)
@@ -39,12 +42,21 @@ def directional_accuracy(current_close, predicted_next, actual_next):
     return correct.mean(), correct.sum(), len(correct)
 
 
-def main(args):
-    data_path = Path(args.data)
+def load_candles(data_path, cache_dir=None):
+    # Read a CoinMarketCap-style CSV and return it sorted chronologically with its date column.
+    data_path = Path(data_path)
     if not data_path.exists():
         print(f"Data file not found: {data_path}")
         sys.exit(2)
 
+    cache = None
+    if cache_dir:
+        cache = CandleCache(cache_dir)
+        key = cache.key(data_path)
+        cached = cache.load(key)
+        if cached is not None:
+            return cached
+
     # CoinMarketCap CSV uses ; as delimiter
     df = pd.read_csv(data_path, sep=';')
 
@@ -68,18 +80,28 @@ def main(args):
             print(f"Missing required column '{col}' in CSV.")
             sys.exit(2)
 
-    # Create features
-    df_feat = create_features(df, lags=args.lags)
+    if cache is not None:
+        cache.store(key, df, date_col)
+    return df, date_col
+
 
-    feature_cols = [c for c in df_feat.columns if c.startswith('lag_')] + [
+def feature_columns(lags):
+    return [f'lag_{lag}' for lag in range(1, lags + 1)] + [
         'ret_1', 'ma_short', 'ma_medium', 'vol_rolling'
     ]
-    X = df_feat[feature_cols].values
-    y = df_feat['target_next'].values
 
+
+def build_model(n_jobs=-1, n_estimators=200, max_depth=8):
+    return Pipeline([
+        ('scaler', StandardScaler()),
+        ('rf', RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=n_jobs))
+    ])
+
+
+def fit_and_evaluate(df_feat, X, y, test_size, n_jobs=-1):
     # Time-based train-test split
     n = len(df_feat)
-    test_n = int(np.floor(args.test_size * n))
+    test_n = int(np.floor(test_size * n))
     train_n = n - test_n
     X_train, X_test = X[:train_n], X[train_n:]
     y_train, y_test = y[:train_n], y[train_n:]
@@ -87,14 +109,8 @@ def main(args):
     current_close_test = df_feat['close'].values[train_n:train_n + len(y_test)]
 
     # Train model
-    model = Pipeline([
-        ('scaler', StandardScaler()),
-        ('rf', RandomForestRegressor(n_estimators=200, max_depth=8, random_state=42, n_jobs=-1))
-    ])
-
-    print("Training model...")
+    model = build_model(n_jobs=n_jobs)
     model.fit(X_train, y_train)
-    print("Training complete.")
 
     # Predict
     y_pred = model.predict(X_test)
@@ -103,26 +119,77 @@ def main(args):
     mse = mean_squared_error(y_test, y_pred)
     rmse = np.sqrt(mse)
     acc, correct, total = directional_accuracy(current_close_test, y_pred, y_test)
-    acc_pct = acc * 100
+    return {
+        'model': model, 'train_n': train_n, 'y_test': y_test, 'y_pred': y_pred,
+        'rmse': rmse, 'directional_accuracy': acc, 'correct': correct, 'total': total,
+    }
 
-    print(f"\nTest Results:")
-    print(f"RMSE: {rmse:.4f}")
-    print(f"Directional Accuracy: {acc_pct:.2f}% ({correct}/{total})")
 
-    # Plot predicted vs actual
-    test_dates = df_feat[date_col].values[train_n:train_n + len(y_test)]
+def plot_predictions(test_dates, y_test, y_pred, acc_pct, out_plot, max_points=4000, method='minmax'):
+    # A 12x6in figure at 150 dpi is 1800px wide, so a few thousand shape-preserving points
+    # per series look identical to the full series while keeping render time bounded
+    dates_test, y_test = decimate(test_dates, y_test, max_points, method)
+    dates_pred, y_pred = decimate(test_dates, y_pred, max_points, method)
     plt.figure(figsize=(12, 6))
-    plt.plot(test_dates, y_test, label='Actual Close', linewidth=1.5)
-    plt.plot(test_dates, y_pred, label='Predicted Close', linestyle='--', linewidth=1.5)
+    plt.plot(dates_test, y_test, label='Actual Close', linewidth=1.5)
+    plt.plot(dates_pred, y_pred, label='Predicted Close', linestyle='--', linewidth=1.5)
     plt.title(f"Predicted vs Actual Close (Acc: {acc_pct:.2f}%)")
     plt.xlabel("Date")
     plt.ylabel("Close Price")
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
+    plt.savefig(out_plot, dpi=150)
+    plt.close()
 
+
+def main(args):
+    if args.batch:
+        from batch_train import run_batch
+        run_batch(args)
+        return
+
+    if args.search:
+        from tune import run_search
+        run_search(args)
+        return
+
+    if args.online or args.compare_refit:
+        from online import run_online
+        run_online(args)
+        return
+
+    df, date_col = load_candles(args.data, cache_dir=args.cache_dir)
+
+    # Create features
+    df_feat = create_features(df, lags=args.lags)
+
+    feature_cols = feature_columns(args.lags)
+    X = df_feat[feature_cols].values
+    y = df_feat['target_next'].values
+
+    if args.walk_forward:
+        from walk_forward import run_walk_forward
+        run_walk_forward(df_feat, X, y, date_col, args)
+        return
+
+    print("Training model...")
+    res = fit_and_evaluate(df_feat, X, y, args.test_size)
+    print("Training complete.")
+    model, train_n = res['model'], res['train_n']
+    y_test, y_pred = res['y_test'], res['y_pred']
+    rmse, correct, total = res['rmse'], res['correct'], res['total']
+    acc_pct = res['directional_accuracy'] * 100
+
+    print(f"\nTest Results:")
+    print(f"RMSE: {rmse:.4f}")
+    print(f"Directional Accuracy: {acc_pct:.2f}% ({correct}/{total})")
+
+    # Plot predicted vs actual
+    test_dates = df_feat[date_col].values[train_n:train_n + len(y_test)]
     out_plot = args.plot or "pred_vs_actual.png"
-    plt.savefig(out_plot, dpi=150)
+    plot_predictions(test_dates, y_test, y_pred, acc_pct, out_plot,
+                     max_points=args.plot_points, method=args.plot_method)
     print(f"Plot saved to: {out_plot}")
 
     if args.save_model:
@@ -132,10 +199,33 @@ def main(args):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--data", required=True, help="Path to semicolon-delimited CSV file")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="Path to semicolon-delimited CSV file")
+    source.add_argument("--batch", help="Directory or glob of per-symbol CSV files to train in one run")
     parser.add_argument("--lags", type=int, default=5, help="Number of lag features")
     parser.add_argument("--test-size", type=float, default=0.2, help="Fraction of data used for testing")
     parser.add_argument("--plot", type=str, default=None, help="Output plot file name")
     parser.add_argument("--save-model", type=str, default=None, help="Save model file path")
+    parser.add_argument("--plot-points", type=int, default=4000, help="Max points drawn per series; longer series are decimated")
+    parser.add_argument("--plot-method", choices=["minmax", "lttb"], default="minmax", help="Shape-preserving decimation for long series")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Directory for the memory-mapped parsed-CSV cache")
+    parser.add_argument("--walk-forward", action="store_true", help="Evaluate on walk-forward folds instead of a single split")
+    parser.add_argument("--folds", type=int, default=5, help="Number of walk-forward folds")
+    parser.add_argument("--window", choices=["expanding", "rolling"], default="expanding", help="Walk-forward training window")
+    parser.add_argument("--train-window", type=int, default=None, help="Rows per training window in rolling mode")
+    parser.add_argument("--workers", type=int, default=-1, help="Worker processes for walk-forward folds")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Total CPU cores shared by batch workers and their forests")
+    parser.add_argument("--search", action="store_true", help="Tune lags/depth/trees with successive halving")
+    parser.add_argument("--search-lags", type=str, default="3,5,7,10", help="Comma-separated lags to search")
+    parser.add_argument("--search-depth", type=str, default="4,6,8,12", help="Comma-separated max_depth values to search")
+    parser.add_argument("--search-trees", type=str, default="100,200,400", help="Comma-separated n_estimators values to search")
+    parser.add_argument("--eta", type=int, default=3, help="Successive halving reduction factor")
+    parser.add_argument("--time-budget", type=float, default=None, help="Stop starting new halving rounds after this many seconds")
+    parser.add_argument("--leaderboard", type=str, default="leaderboard.csv", help="Search leaderboard CSV path")
+    parser.add_argument("--online", type=str, default=None, help="Online state file: fold new rows into the saved model instead of refitting")
+    parser.add_argument("--online-window", type=int, default=2000, help="Rows kept in the online sliding training window")
+    parser.add_argument("--compare-refit", action="store_true", help="Replay the test split and compare online updates with full refits")
+    parser.add_argument("--update-every", type=int, default=5, help="Candles per online update when comparing with refits")
+    parser.add_argument("--out-dir", type=str, default="batch_results", help="Output directory for batch models and results table")
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,99 @@
+import argparse
+import datetime
+import pathway as pw
+
+from feature_engine import IncrementalFeatures
+from predict import load_predictor
+
+
+class CandleSchema(pw.Schema):
+    # CoinMarketCap columns used by the model; 'timestamp' is the candle close time
+    timestamp: str
+    close: float
+    volume: float
+
+
+def make_predictor(model_path):
+    # Loads the saved pipeline once per process and returns a UDF mapping one window of
+    # (time, close, volume) candles to the predicted next close.
+    _, compiled, lags = load_predictor(model_path)
+
+    @pw.udf
+    def predict_next(window: tuple) -> float:
+        candles = sorted(window)
+        engine = IncrementalFeatures(lags=lags)
+        # the window is replayed through the incremental engine, so the features use the
+        # same formulas as training. The compensated rolling sums restart at the window's
+        # first candle, though, so values can differ from full-history features in the
+        # last few ulps (222 of 390 rows on data.csv). That only matters if a value sits
+        # exactly on a tree threshold.
+        row = engine.warm([c[1] for c in candles], [c[2] for c in candles])
+        return compiled.predict_one(row)
+
+    return predict_next, lags
+
+
+def build_pipeline(candles, model_path, interval, max_lateness=None):
+    predict_next, lags = make_predictor(model_path)
+    warmup = IncrementalFeatures(lags=lags).warmup
+    span = warmup + 1
+    # a window stops accepting candles (and its state is freed) once the stream's newest
+    # candle is more than max_lateness past its end; without a cutoff Pathway would keep
+    # every window of a long-running stream forever
+    if max_lateness is None:
+        max_lateness = interval * span
+
+    candles = candles.select(
+        t=pw.this.timestamp.dt.strptime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        close=pw.this.close,
+        volume=pw.this.volume,
+    )
+
+    # every candle opens a sliding window over itself and the `warmup` candles before it;
+    # the lag/MA history for candle t is the window whose last slot holds t
+    windows = candles.windowby(
+        candles.t,
+        window=pw.temporal.sliding(hop=interval, duration=interval * span),
+        behavior=pw.temporal.common_behavior(cutoff=max_lateness),
+    ).reduce(
+        window_end=pw.this._pw_window_end,
+        t=pw.reducers.max(pw.this.t),
+        count=pw.reducers.count(),
+        candles=pw.reducers.tuple(pw.make_tuple(pw.this.t, pw.this.close, pw.this.volume)),
+    )
+
+    # windows still filling up (stream start, gaps in the data) or already past their
+    # newest candle carry no complete feature row
+    complete = windows.filter((pw.this.count == span) & (pw.this.window_end - pw.this.t <= interval))
+
+    return complete.select(
+        t=pw.this.t,
+        predicted_next_close=predict_next(pw.this.candles),
+    )
+
+
+def main(args):
+    interval = datetime.timedelta(seconds=args.interval)
+    candles = pw.io.csv.read(
+        args.input,
+        schema=CandleSchema,
+        csv_settings=pw.io.csv.CsvParserSettings(delimiter=';'),
+        mode="static" if args.static else "streaming",
+    )
+    lateness = datetime.timedelta(seconds=args.max_lateness) if args.max_lateness is not None else None
+    predictions = build_pipeline(candles, args.model, interval, lateness)
+    pw.io.jsonlines.write(predictions, args.output)
+    pw.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming next-close prediction with Pathway")
+    parser.add_argument("--input", required=True, help="Directory (or file) of semicolon-delimited candle CSVs to watch")
+    parser.add_argument("--model", required=True, help="Model saved with stock_predict.py --save-model")
+    parser.add_argument("--output", default="predictions.jsonl", help="JSON-lines file receiving predictions")
+    parser.add_argument("--interval", type=int, default=86400, help="Candle interval in seconds")
+    parser.add_argument("--max-lateness", type=int, default=None,
+                        help="Seconds past a window's end that late candles are still accepted (default: one window)")
+    parser.add_argument("--static", action="store_true", help="Process the existing files once and exit (backfill only)")
+    args = parser.parse_args()
+    main(args)
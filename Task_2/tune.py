@@ -0,0 +1,123 @@
+import itertools
+import math
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_squared_error
+
+from stock_predict import (load_candles, create_features, feature_columns, build_model,
+                           directional_accuracy)
+from walk_forward import walk_forward_splits
+
+
+def parse_grid(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def build_datasets(df, lags_values):
+    # One feature matrix per lags value, computed once and reused by every candidate.
+    # All matrices end on the same candle; trimming them to the shortest length aligns
+    # their rows so every candidate is scored on identical folds.
+    feats = {}
+    for lags in lags_values:
+        df_feat = create_features(df, lags=lags)
+        feats[lags] = (df_feat[feature_columns(lags)].values, df_feat['target_next'].values,
+                       df_feat['close'].values)
+    n = min(len(X) for X, _, _ in feats.values())
+    return {lags: tuple(a[-n:] for a in arrays) for lags, arrays in feats.items()}, n
+
+
+def score_candidate(params, X, y, current_close, splits, train_frac):
+    # Mean walk-forward score using only the most recent train_frac of each training fold,
+    # which is the resource successive halving grows between rounds.
+    start = time.perf_counter()
+    rmses, correct, total = [], 0, 0
+    for train_idx, test_idx in splits:
+        keep = max(1, int(math.ceil(len(train_idx) * train_frac)))
+        train_idx = train_idx[-keep:]
+        model = build_model(n_jobs=1, n_estimators=params['n_estimators'], max_depth=params['max_depth'])
+        model.fit(X[train_idx], y[train_idx])
+        y_pred = model.predict(X[test_idx])
+        rmses.append(np.sqrt(mean_squared_error(y[test_idx], y_pred)))
+        _, c, t = directional_accuracy(current_close[test_idx], y_pred, y[test_idx])
+        correct += int(c)
+        total += int(t)
+    return dict(params, train_frac=train_frac, rmse=float(np.mean(rmses)),
+                directional_accuracy=correct / total * 100, seconds=time.perf_counter() - start)
+
+
+def successive_halving(datasets, candidates, splits, eta=3, workers=1, time_budget=None):
+    # Score every candidate on a small slice of history, keep the best 1/eta, grow the
+    # slice by eta and repeat until one candidate is left or the full history was used.
+    rounds = max(1, int(math.ceil(math.log(len(candidates), eta)))) if len(candidates) > 1 else 1
+    train_frac = 1.0 / eta ** (rounds - 1)
+    start = time.perf_counter()
+    trials = []
+    survivors = candidates
+    for r in range(rounds):
+        print(f"Round {r + 1}/{rounds}: {len(survivors)} candidates on {train_frac:.0%} of each training fold")
+        results = Parallel(n_jobs=workers, max_nbytes='1M', mmap_mode='r')(
+            delayed(score_candidate)(params, *datasets[params['lags']], splits, train_frac)
+            for params in survivors
+        )
+        for res in results:
+            res['round'] = r + 1
+        trials.extend(results)
+
+        ranked = sorted(results, key=lambda res: res['rmse'])
+        keep = max(1, int(math.ceil(len(ranked) / eta)))
+        survivors = [{k: res[k] for k in ('lags', 'max_depth', 'n_estimators')} for res in ranked[:keep]]
+        train_frac = min(1.0, train_frac * eta)
+        if time_budget is not None and time.perf_counter() - start > time_budget and r + 1 < rounds:
+            print(f"Time budget of {time_budget:.0f}s reached, keeping the current leader.")
+            break
+    return survivors[0], pd.DataFrame(trials)
+
+
+def run_search(args):
+    df, _ = load_candles(args.data, cache_dir=args.cache_dir)
+    grid = {
+        'lags': parse_grid(args.search_lags),
+        'max_depth': parse_grid(args.search_depth),
+        'n_estimators': parse_grid(args.search_trees),
+    }
+    candidates = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+    datasets, n = build_datasets(df, grid['lags'])
+    # tune on the training portion only; the final test block stays unseen until the end
+    test_n = int(np.floor(args.test_size * n))
+    train_n = n - test_n
+    search_sets = {lags: tuple(a[:train_n] for a in arrays) for lags, arrays in datasets.items()}
+    splits = walk_forward_splits(train_n, folds=args.folds)
+
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    print(f"Searching {len(candidates)} candidates over {len(splits)} folds on {workers} workers...")
+    best, trials = successive_halving(search_sets, candidates, splits, eta=args.eta,
+                                      workers=workers, time_budget=args.time_budget)
+
+    leaderboard = trials.sort_values(['round', 'rmse'], ascending=[False, True])
+    leaderboard = leaderboard[['round', 'lags', 'max_depth', 'n_estimators', 'train_frac',
+                               'rmse', 'directional_accuracy', 'seconds']]
+    leaderboard.to_csv(args.leaderboard, index=False)
+    print("\nLeaderboard (top 10):")
+    print(leaderboard.head(10).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"Leaderboard saved to: {args.leaderboard}")
+
+    # refit the winner on the whole training portion and score it on the held-out block
+    X, y, current_close = datasets[best['lags']]
+    model = build_model(n_estimators=best['n_estimators'], max_depth=best['max_depth'])
+    model.fit(X[:train_n], y[:train_n])
+    y_pred = model.predict(X[train_n:])
+    rmse = np.sqrt(mean_squared_error(y[train_n:], y_pred))
+    acc, correct, total = directional_accuracy(current_close[train_n:], y_pred, y[train_n:])
+    print(f"\nBest: lags={best['lags']} max_depth={best['max_depth']} n_estimators={best['n_estimators']}")
+    print(f"Holdout RMSE: {rmse:.4f}")
+    print(f"Holdout Directional Accuracy: {acc * 100:.2f}% ({correct}/{total})")
+
+    out_model = args.save_model or "best_model.joblib"
+    joblib.dump(model, out_model)
+    print(f"Model saved to: {out_model}")
+    return best, leaderboard
@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.metrics import mean_squared_error
+
+from stock_predict import build_model, directional_accuracy
+
+
+def walk_forward_splits(n, folds=5, window='expanding', train_window=None):
+    # Chronological folds: each test block follows its training block, never overlapping it.
+    # 'expanding' trains on everything before the block, 'rolling' on the last train_window rows.
+    test_n = n // (folds + 1)
+    if test_n < 1:
+        raise ValueError(f"Not enough rows ({n}) for {folds} walk-forward folds.")
+    if window == 'rolling' and train_window is None:
+        # default to the size of the first training block so every fold sees the same amount of history
+        train_window = n - folds * test_n
+    max_train = train_window if window == 'rolling' else None
+    splitter = TimeSeriesSplit(n_splits=folds, max_train_size=max_train)
+    return list(splitter.split(np.arange(n)))
+
+
+def fit_fold(fold, X, y, current_close, train_idx, test_idx):
+    # Runs inside a worker: X/y/current_close arrive memory-mapped read-only, only the
+    # index ranges differ per fold. One tree-building thread per worker avoids oversubscription.
+    model = build_model(n_jobs=1)
+    model.fit(X[train_idx], y[train_idx])
+    y_pred = model.predict(X[test_idx])
+    y_test = y[test_idx]
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    acc, correct, total = directional_accuracy(current_close[test_idx], y_pred, y_test)
+    return {
+        'fold': fold,
+        'train_rows': len(train_idx),
+        'test_rows': len(test_idx),
+        'rmse': rmse,
+        'directional_accuracy': acc,
+        'correct': int(correct),
+        'total': int(total),
+    }
+
+
+def run_walk_forward(df_feat, X, y, date_col, args):
+    splits = walk_forward_splits(len(X), folds=args.folds, window=args.window, train_window=args.train_window)
+    current_close = df_feat['close'].values
+    dates = df_feat[date_col].values
+
+    n_workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    n_workers = min(n_workers, len(splits))
+    print(f"Running {len(splits)} {args.window} walk-forward folds on {n_workers} workers...")
+
+    # features are computed once; joblib memory-maps the large arrays so workers share them read-only
+    results = Parallel(n_jobs=n_workers, max_nbytes='1M', mmap_mode='r')(
+        delayed(fit_fold)(i + 1, X, y, current_close, train_idx, test_idx)
+        for i, (train_idx, test_idx) in enumerate(splits)
+    )
+
+    report = pd.DataFrame(results)
+    report['test_start'] = [dates[test_idx[0]] for _, test_idx in splits]
+    report['test_end'] = [dates[test_idx[-1]] for _, test_idx in splits]
+    report['directional_accuracy'] = report['directional_accuracy'] * 100
+
+    print("\nWalk-Forward Results:")
+    print(report[['fold', 'train_rows', 'test_rows', 'test_start', 'test_end', 'rmse', 'directional_accuracy']]
+          .to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    pooled = report['correct'].sum() / report['total'].sum() * 100
+    print(f"\nRMSE: mean {report['rmse'].mean():.4f}, std {report['rmse'].std(ddof=0):.4f}")
+    print(f"Directional Accuracy: mean {report['directional_accuracy'].mean():.2f}%, "
+          f"pooled {pooled:.2f}% ({report['correct'].sum()}/{report['total'].sum()})")
+    return report
@@ -0,0 +1,114 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import fitz # PyMuPDF
+
+from ocr_utils import file_to_text, pdf_page_to_text, needs_ocr, ocr_settings
+from profiling import PROFILER, stage, count
+
+
+def _init_worker(trace: bool = False):
+    # Tesseract parallelises each page with OpenMP; with one page per worker process that
+    # only makes the workers fight over cores, so every tesseract call gets a single thread.
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    PROFILER.trace = trace
+
+
+def _run_task(fn, fn_args, path):
+    # Runs one task in a worker and ships its stage timings back with the result.
+    PROFILER.reset()
+    with PROFILER.document(path):
+        text = fn(*fn_args)
+    return text, PROFILER.snapshot()
+
+
+def _tasks_for(path: str, mode: str) -> list:
+    # PDFs are split into one task per page so a long statement spreads over the pool.
+    if Path(path).suffix.lower() == '.pdf':
+        with fitz.open(path) as doc:
+            return [(pdf_page_to_text, (path, i)) for i in range(doc.page_count)]
+    return [(file_to_text, (path, None, mode))]
+
+
+class _Pending:
+    # One input document on its way through the pool: a cache hit carries its text,
+    # a miss its page tasks (not yet submitted) and the futures of the submitted ones.
+    def __init__(self, path, key, text=None, tasks=()):
+        self.path = path
+        self.key = key
+        self.text = text
+        self.tasks = deque(tasks)
+        self.futures = deque()
+
+
+def batch_file_to_text(paths, workers: int = None, max_inflight: int = None, cache=None, mode: str = 'full'):
+    # Yield (path, text) for every input, in input order, OCRing documents and PDF pages
+    # in a bounded process pool. At most max_inflight tasks are queued at once, so a huge
+    # upload list never floods the pool or holds every finished text in memory.
+    # Cache lookups and writes stay in this process; workers only ever see misses.
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or workers * 2
+    paths = list(paths)
+
+    if workers == 1:
+        _init_worker(PROFILER.trace)
+        for p in paths:
+            with PROFILER.document(p):
+                text = file_to_text(p, cache=cache, mode=mode)
+            yield p, text
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(PROFILER.trace,)) as pool:
+        pending = deque()  # _Pending per admitted document, in input order
+        inflight = 0
+        next_doc = 0
+
+        def submit(doc):
+            nonlocal inflight
+            while doc.tasks and inflight < max_inflight:
+                fn, fn_args = doc.tasks.popleft()
+                doc.futures.append(pool.submit(_run_task, fn, fn_args, doc.path))
+                inflight += 1
+
+        def fill():
+            # submit tasks one at a time, oldest document first, up to the in-flight bound;
+            # then admit new documents (cache hits count against the bound too, so buffered
+            # texts stay bounded). Always admit at least one document.
+            nonlocal next_doc
+            for doc in pending:
+                submit(doc)
+            while next_doc < len(paths) and ((inflight < max_inflight and len(pending) < max_inflight) or not pending):
+                p = paths[next_doc]
+                next_doc += 1
+                key = None
+                if cache is not None and needs_ocr(p):
+                    with PROFILER.document(p), stage('cache_get'):
+                        key = cache.key(p, ocr_settings(mode))
+                        text = cache.get(key)
+                    count('cache_hits' if text is not None else 'cache_misses')
+                    if text is not None:
+                        pending.append(_Pending(p, key, text))
+                        continue
+                pending.append(_Pending(p, key, tasks=_tasks_for(p, mode)))
+                submit(pending[-1])
+
+        while next_doc < len(paths) or pending:
+            fill()
+            doc = pending[0]
+            if doc.text is None:
+                # the oldest document's tasks are always submitted first, so while it has
+                # tasks left it also has futures to wait on
+                parts = []
+                while doc.futures:
+                    part, snap = doc.futures.popleft().result()
+                    inflight -= 1
+                    parts.append(part)
+                    PROFILER.merge(snap)
+                    fill()
+                doc.text = "\n".join(parts)
+                if doc.key is not None:
+                    with PROFILER.document(doc.path), stage('cache_put'):
+                        cache.put(doc.key, doc.text)
+            pending.popleft()
+            yield doc.path, doc.text
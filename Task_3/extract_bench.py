@@ -0,0 +1,89 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+from extract_utils import extract_aadhar, extract_pan, generic_extract, extract_many, parse_date
+
+
+def two_pass_extract(text: str) -> dict:
+    # The former generic_extract: both extractors over the whole text, Aadhaar preferred.
+    a = extract_aadhar(text)
+    p = extract_pan(text)
+    if a.get('id_number'):
+        return a
+    if p.get('id_number'):
+        return p
+    return {'doc_type': 'UNKNOWN', 'name': a.get('name') or p.get('name'),
+            'dob': a.get('dob') or p.get('dob'), 'id_number': a.get('id_number') or p.get('id_number')}
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> list:
+    # OCR-like card texts: header noise, a name, a DOB with -, / or . separators and an id.
+    rng = random.Random(seed)
+    first = ['RAHUL', 'PRIYA', 'AMIT', 'SUNITA', 'VIKRAM', 'ANITA', 'ARJUN', 'MEERA']
+    last = ['SHARMA', 'VERMA', 'PATEL', 'KUMAR', 'SINGH', 'IYER', 'REDDY', 'DAS']
+    texts = []
+    for _ in range(n):
+        name = f"{rng.choice(first)} {rng.choice(last)}"
+        sep = rng.choice('-/.')
+        dob = f"{rng.randint(1, 28):02d}{sep}{rng.randint(1, 12):02d}{sep}{rng.randint(1950, 2005)}"
+        if rng.random() < 0.5:
+            digits = ''.join(str(rng.randint(0, 9)) for _ in range(12))
+            texts.append(f"GOVERNMENT OF INDIA\n{name}\nDOB: {dob}\nMale\n"
+                         f"{digits[:4]} {digits[4:8]} {digits[8:]}\nMera Aadhaar, Meri Pehchan")
+        else:
+            pan = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(5)) + \
+                  f"{rng.randint(0, 9999):04d}" + rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+            texts.append(f"INCOME TAX DEPARTMENT GOVT. OF INDIA\nName: {name}\n"
+                         f"Father's Name: {rng.choice(first)} {rng.choice(last)}\n{dob}\n"
+                         f"Permanent Account Number\n{pan}\nSignature")
+    return texts
+
+
+def load_corpus(args) -> list:
+    texts = []
+    if args.ocr_cache:
+        conn = sqlite3.connect(args.ocr_cache)
+        texts += [row[0] for row in conn.execute('SELECT text FROM ocr_cache')]
+        conn.close()
+    for d in args.text_dirs:
+        texts += [p.read_text(errors='ignore') for p in sorted(Path(d).glob('*.txt'))]
+    if not texts:
+        texts = synthetic_corpus(args.synthetic, seed=args.seed)
+    # repeat small corpora so timings are not dominated by timer noise
+    return (texts * (args.min_texts // len(texts) + 1))[:max(args.min_texts, len(texts))]
+
+
+def timed(label, fn, texts):
+    parse_date.cache_clear()
+    start = time.perf_counter()
+    out = fn(texts)
+    seconds = time.perf_counter() - start
+    print(f"  {label:<14} {seconds:8.3f}s {len(texts) / seconds:12,.0f} texts/s")
+    return out, seconds
+
+
+def main(args):
+    texts = load_corpus(args)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"{len(texts)} texts, {sum(map(len, texts)) / 2 ** 20:.1f} MB")
+    ref, ref_s = timed('two-pass', lambda ts: [two_pass_extract(t) for t in ts], texts)
+    out, one_s = timed('single-pass', lambda ts: [generic_extract(t) for t in ts], texts)
+    batch, batch_s = timed(f'batch x{workers}', lambda ts: extract_many(ts, workers=workers), texts)
+    mismatches = sum(r != o for r, o in zip(ref, out)) + sum(r != b for r, b in zip(ref, batch))
+    print(f"Speedup: single-pass {ref_s / one_s:.1f}x, batch {ref_s / batch_s:.1f}x; mismatches: {mismatches}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extraction throughput over a corpus of OCR outputs')
+    parser.add_argument('text_dirs', nargs='*', help='Directories of .txt OCR outputs')
+    parser.add_argument('--ocr-cache', default=None, help='Also read every text stored in this OCR cache DB')
+    parser.add_argument('--synthetic', type=int, default=10000, help='Synthetic texts when no corpus is given')
+    parser.add_argument('--min-texts', type=int, default=10000, help='Repeat the corpus up to this many texts')
+    parser.add_argument('--workers', type=int, default=None, help='Processes for the batch run (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    args = parser.parse_args()
+    main(args)
@@ -1,41 +1,93 @@
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
 from dateutil import parser
 
+# Patterns are compiled once at import; extraction runs them against every OCR text.
+PAN_RE = re.compile(r"\b([A-Z]{5}[0-9]{4}[A-Z])\b")
+AADHAAR_RE = re.compile(r"\b(\d{4}\s?\d{4}\s?\d{4})\b")
+NAME_RE = re.compile(r"Name[:\s]+([A-Z\s]{3,100})", flags=re.IGNORECASE)
+PAN_NAME_LINE_RE = re.compile(r"^[A-Z\s]{4,}$")
+AADHAAR_NAME_LINE_RE = re.compile(r"^[A-Z\s]{3,}$")
+DATE_RE = re.compile(r"(\d{2}[-/.]\d{2}[-/.]\d{4})")
+DOB_RE = re.compile(r"DOB[:\s]*(\d{2}[-/.]\d{2}[-/.]\d{4})", flags=re.IGNORECASE)
+SPACE_RE = re.compile(r"\s+")
+NON_ALPHA_RE = re.compile(r"[^A-Za-z\s]")
+
+
 def normalize_name(name: str) -> str:
     if not name:
         return ''
-    s = re.sub(r"[^A-Za-z\s]", "", name).strip().upper()
-    s = re.sub(r"\s+", " ", s)
+    s = NON_ALPHA_RE.sub("", name).strip().upper()
+    s = SPACE_RE.sub(" ", s)
     return s
 
 
+@lru_cache(maxsize=4096)
+def parse_date(s: str) -> str:
+    # ISO date for a matched NN?NN?YYYY string, or the raw string when it is not a date.
+    # Indian ID cards print DD-MM-YYYY (DD/MM, DD.MM), so the first field is the day, as
+    # with dateutil's dayfirst=True: it is read as the month only when the second one
+    # cannot be. Fast path for the common shape; anything else goes through dateutil.
+    if s[2] == s[5]:
+        a, b, y = int(s[0:2]), int(s[3:5]), int(s[6:10])
+        if 1 <= b <= 12:
+            d, m = a, b
+        elif 1 <= a <= 12:
+            d, m = b, a
+        else:
+            return s
+        try:
+            return date(y, m, d).isoformat()
+        except ValueError:
+            return s
+    try:
+        return str(parser.parse(s, dayfirst=True).date())
+    except Exception:
+        return s
+
+
+def _name_lines(text: str) -> list:
+    return [l.strip() for l in text.splitlines() if l.strip()]
+
+
+def _pan_line_name(lines: list):
+    # fallback: first long uppercase line
+    for l in lines[:8]:
+        if PAN_NAME_LINE_RE.match(l):
+            return l
+    return None
+
+
+def _aadhaar_line_name(lines: list):
+    for l in lines[:10]:
+        # skip lines like 'GOVERNMENT OF INDIA'
+        if AADHAAR_NAME_LINE_RE.match(l) and len(l.split()) < 6:
+            return l
+    return None
+
+
 def extract_pan(text: str) -> dict:
     # Extract PAN-like fields from free text. PAN in India is a 10-character alphanumeric (e.g., ABCDE1234F).
     # Also try to capture NAME and DOB lines nearby using simple heuristics.
-    
+
     res = {'doc_type': 'PAN', 'name': None, 'dob': None, 'id_number': None}
     # PAN pattern
-    pan_match = re.search(r"\b([A-Z]{5}[0-9]{4}[A-Z])\b", text)
+    pan_match = PAN_RE.search(text)
     if pan_match:
         res['id_number'] = pan_match.group(1)
     # NAME heuristics: find lines with 'Name' or uppercase sequences
-    name_match = re.search(r"Name[:\s]+([A-Z\s]{3,100})", text, flags=re.IGNORECASE)
+    name_match = NAME_RE.search(text)
     if name_match:
         res['name'] = name_match.group(1).strip()
     else:
-        # fallback: first long uppercase line
-        lines = [l.strip() for l in text.splitlines() if l.strip()]
-        for l in lines[:8]:
-            if re.match(r"^[A-Z\s]{4,}$", l):
-                res['name'] = l
-                break
+        res['name'] = _pan_line_name(_name_lines(text))
     # DOB pattern (common formats)
-    dob_match = re.search(r"(\d{2}[-/.]\d{2}[-/.]\d{4})", text)
+    dob_match = DATE_RE.search(text)
     if dob_match:
-        try:
-            res['dob'] = str(parser.parse(dob_match.group(1)).date())
-        except Exception:
-            res['dob'] = dob_match.group(1)
+        res['dob'] = parse_date(dob_match.group(1))
     return res
 
 
@@ -46,44 +98,61 @@ def extract_aadhar(text: str) -> dict:
     # Aadhar numbers are 12-digit numeric sequences often grouped as 4-4-4.
     res = {'doc_type': 'AADHAAR', 'name': None, 'dob': None, 'id_number': None}
     # Aadhaar number
-    a_match = re.search(r"\b(\d{4}\s?\d{4}\s?\d{4})\b", text)
+    a_match = AADHAAR_RE.search(text)
     if a_match:
-        res['id_number'] = re.sub(r"\s+", "", a_match.group(1))
+        res['id_number'] = SPACE_RE.sub("", a_match.group(1))
     # Name heuristics
-    name_match = re.search(r"Name[:\s]+([A-Z\s]{3,100})", text, flags=re.IGNORECASE)
+    name_match = NAME_RE.search(text)
     if name_match:
         res['name'] = name_match.group(1).strip()
     else:
-        lines = [l.strip() for l in text.splitlines() if l.strip()]
-        for l in lines[:10]:
-            if re.match(r"^[A-Z\s]{3,}$", l):
-            # skip lines like 'GOVERNMENT OF INDIA'
-                if len(l.split()) < 6:
-                    res['name'] = l
-                    break
+        res['name'] = _aadhaar_line_name(_name_lines(text))
     # DOB patterns: often 'DOB: DD-MM-YYYY' or 'Year of Birth'
-    dob_match = re.search(r"DOB[:\s]*(\d{2}[-/.]\d{2}[-/.]\d{4})", text, flags=re.IGNORECASE)
-    if not dob_match:
-        dob_match = re.search(r"(\d{2}[-/.]\d{2}[-/.]\d{4})", text)
+    dob_match = DOB_RE.search(text) or DATE_RE.search(text)
     if dob_match:
-        try:
-            res['dob'] = str(parser.parse(dob_match.group(1)).date())
-        except Exception:
-            res['dob'] = dob_match.group(1)
+        res['dob'] = parse_date(dob_match.group(1))
     return res
 
 
 
 
 def generic_extract(text: str) -> dict:
-    # Try both PAN and Aadhaar extractors and return the best match.
-    a = extract_aadhar(text)
-    p = extract_pan(text)
-    # prefer the one with an id_number
-    if a.get('id_number'):
-        return a
-    if p.get('id_number'):
-        return p
-    # fallback: merge heuristics
-    merged = {'doc_type': 'UNKNOWN', 'name': a.get('name') or p.get('name'), 'dob': a.get('dob') or p.get('dob'), 'id_number': a.get('id_number') or p.get('id_number')}
-    return merged
\ No newline at end of file
+    # Single pass over the text for both document types, with the same result as running
+    # extract_aadhar and extract_pan and keeping the one with an id_number (Aadhaar first).
+    # The name and date patterns are shared by both, so each runs at most once, and lines
+    # are only split when no 'Name:' label is present.
+    a_match = AADHAAR_RE.search(text)
+    if a_match:
+        doc_type, id_number = 'AADHAAR', SPACE_RE.sub("", a_match.group(1))
+    else:
+        p_match = PAN_RE.search(text)
+        doc_type, id_number = ('PAN', p_match.group(1)) if p_match else ('UNKNOWN', None)
+
+    name_match = NAME_RE.search(text)
+    if name_match:
+        name = name_match.group(1).strip()
+    else:
+        lines = _name_lines(text)
+        if doc_type == 'AADHAAR':
+            name = _aadhaar_line_name(lines)
+        elif doc_type == 'PAN':
+            name = _pan_line_name(lines)
+        else:
+            # fallback: merge heuristics
+            name = _aadhaar_line_name(lines) or _pan_line_name(lines)
+
+    # PAN only looks at the first date; Aadhaar (and so the merged fallback) prefers a DOB label
+    dob_match = DATE_RE.search(text) if doc_type == 'PAN' else (DOB_RE.search(text) or DATE_RE.search(text))
+    dob = parse_date(dob_match.group(1)) if dob_match else None
+    return {'doc_type': doc_type, 'name': name, 'dob': dob, 'id_number': id_number}
+
+
+def extract_many(texts, workers: int = 1, chunksize: int = 256) -> list:
+    # generic_extract over many texts, e.g. when re-verifying stored records. With
+    # workers > 1 the texts are handed to a process pool in chunks, results in input order.
+    texts = list(texts)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(texts) <= chunksize:
+        return [generic_extract(t) for t in texts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(generic_extract, texts, chunksize=chunksize))
@@ -0,0 +1,124 @@
+import sqlite3
+import time
+
+from extract_utils import normalize_name
+from fraud_check import names_similar
+
+FIELDS = ('id', 'doc_type', 'name', 'dob', 'id_number', 'source', 'created_at')
+
+
+class KYCStore:
+    # Persistent store of every extracted document, indexed for cross-submission fraud
+    # checks. id_number and dob are B-tree indexed, and each normalized name token is
+    # indexed together with the record's DOB, so every check is a handful of index
+    # lookups instead of a scan. Candidates from the token index are confirmed with
+    # names_similar, which matches names on a shared token, so the index misses none.
+    def __init__(self, db_path: str = 'kyc_store.db', max_candidates: int = 1000):
+        self.db_path = db_path
+        self.max_candidates = max_candidates
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                doc_type TEXT NOT NULL,
+                name TEXT,
+                dob TEXT,
+                id_number TEXT,
+                source TEXT,
+                created_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_records_id_number ON records (id_number)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_records_dob ON records (dob)')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS name_tokens (
+                token TEXT NOT NULL,
+                dob TEXT NOT NULL,
+                record_id INTEGER NOT NULL,
+                PRIMARY KEY (token, dob, record_id)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.commit()
+
+    @staticmethod
+    def _tokens(name) -> list:
+        return sorted(set(normalize_name(name).split()))
+
+    def _rows(self, sql: str, params) -> list:
+        return [dict(zip(FIELDS, row)) for row in self.conn.execute(sql, params)]
+
+    def _insert(self, doc: dict, source=None) -> int:
+        cur = self.conn.execute(
+            'INSERT INTO records (doc_type, name, dob, id_number, source, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (doc.get('doc_type') or 'UNKNOWN', doc.get('name') or None, doc.get('dob') or None,
+             doc.get('id_number') or None, source or doc.get('source'), time.time())
+        )
+        if doc.get('dob'):
+            self.conn.executemany('INSERT OR IGNORE INTO name_tokens (token, dob, record_id) VALUES (?, ?, ?)',
+                                  [(t, doc['dob'], cur.lastrowid) for t in self._tokens(doc.get('name'))])
+        return cur.lastrowid
+
+    def add(self, doc: dict, source=None) -> int:
+        record_id = self._insert(doc, source)
+        self.conn.commit()
+        return record_id
+
+    def add_many(self, docs) -> int:
+        # Bulk load (e.g. back-filling past submissions) in one transaction.
+        n = 0
+        for doc in docs:
+            self._insert(doc)
+            n += 1
+        self.conn.commit()
+        return n
+
+    def find_by_id(self, id_number: str) -> list:
+        return self._rows(f'SELECT {", ".join(FIELDS)} FROM records WHERE id_number = ? LIMIT ?',
+                          (id_number, self.max_candidates))
+
+    def find_similar(self, name: str, dob: str) -> list:
+        # Records with the same DOB sharing at least one name token, confirmed by names_similar.
+        tokens = self._tokens(name)
+        if not tokens or not dob:
+            return []
+        marks = ', '.join('?' * len(tokens))
+        rows = self._rows(
+            f'SELECT {", ".join("r." + f for f in FIELDS)} FROM records r WHERE r.id IN ('
+            f'SELECT record_id FROM name_tokens WHERE token IN ({marks}) AND dob = ? LIMIT ?)',
+            (*tokens, dob, self.max_candidates)
+        )
+        return [r for r in rows if names_similar(name, r['name'])]
+
+    def check(self, doc: dict) -> list:
+        # Flags for one document against every stored record:
+        #   id_name_mismatch      same id_number, name not similar
+        #   id_dob_mismatch       same id_number, different DOB
+        #   identity_multiple_ids similar name and same DOB under another id_number of the same type
+        flags = []
+        id_number, dob, name = doc.get('id_number'), doc.get('dob'), doc.get('name')
+        if id_number:
+            for r in self.find_by_id(id_number):
+                if name and r['name'] and not names_similar(name, r['name']):
+                    flags.append({'rule': 'id_name_mismatch', 'record': r})
+                if dob and r['dob'] and dob != r['dob']:
+                    flags.append({'rule': 'id_dob_mismatch', 'record': r})
+        if name and dob:
+            for r in self.find_similar(name, dob):
+                if (r['doc_type'] == doc.get('doc_type') and r['id_number'] and id_number
+                        and r['id_number'] != id_number):
+                    flags.append({'rule': 'identity_multiple_ids', 'record': r})
+        return flags
+
+    def check_and_add(self, doc: dict, source=None) -> list:
+        flags = self.check(doc)
+        self.add(doc, source)
+        return flags
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
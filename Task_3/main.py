@@ -1,38 +1,31 @@
 import argparse
 from pathlib import Path
-from ocr_utils import file_to_text
+from batch_ocr import batch_file_to_text
+from ocr_cache import OCRCache
 from extract_utils import generic_extract, normalize_name
 from fraud_check import compare_documents
+from kyc_store import KYCStore
+from stream_kyc import fraud_flags
+from profiling import PROFILER, stage
 import pathway as pw
 import pandas as pd
 
 
 
 
-def build_markdown_table(docs):
-    """Create a simple markdown table for Pathway debug printing."""
-    hdr = "doc_type | name | dob | id_number"
-    rows = [hdr, "--- | --- | --- | ---"]
-    for d in docs:
-        # Escape any pipe characters and properly handle empty values
-        doc_type = str(d.get('doc_type', '')).strip().replace('|', '\\|') or '-'
-        name = str(d.get('name', '')).strip().replace('|', '\\|') or '-'
-        dob = str(d.get('dob', '')).strip().replace('|', '\\|') or '-'
-        id_number = str(d.get('id_number', '')).strip().replace('|', '\\|') or '-'
-        # Add quotes around fields that might contain spaces
-        row = f'"{doc_type}" | "{name}" | "{dob}" | "{id_number}"'
-        rows.append(row)
-    return "\n".join(rows)
-
-
 def main(args):
+    PROFILER.trace = bool(args.profile)
     paths = args.files
     docs = []
-    for p in paths:
-        text = file_to_text(p)
-        info = generic_extract(text)
-        # normalize and keep raw text snippet for debugging
-        info['name'] = normalize_name(info.get('name') or '')
+    cache = OCRCache(args.ocr_cache, max_bytes=args.ocr_cache_mb * 1024 * 1024) if args.ocr_cache else None
+    store = KYCStore(args.kyc_store) if args.kyc_store else None
+    store_flags = []
+    # OCR runs in a bounded process pool; results come back in input order
+    for p, text in batch_file_to_text(paths, workers=args.workers, cache=cache, mode=args.ocr_mode):
+        with PROFILER.document(p), stage('extract'):
+            info = generic_extract(text)
+            # normalize and keep raw text snippet for debugging
+            info['name'] = normalize_name(info.get('name') or '')
         info['source'] = p
         # Only keep the fields we need for the table
         info_filtered = {
@@ -42,29 +35,63 @@ def main(args):
             'id_number': info.get('id_number', '')
         }
         docs.append(info_filtered)
+        if store is not None:
+            # check against every past submission, then remember this one
+            with PROFILER.document(p), stage('kyc_store'):
+                for flag in store.check_and_add(info_filtered, source=p):
+                    store_flags.append({'source': p, **flag})
 
-    summary = compare_documents(docs)
+    with stage('compare'):
+        summary = compare_documents(docs)
 
     # Debug print to see what's going into the table
     print("\nDocument data before table creation:")
     for doc in docs:
         print(doc)
 
-    # Prepare a small human-friendly output using Pathway debug table
-    md = build_markdown_table(docs)
-    print("\nMarkdown table content:")
-    print(md)
-    table = pw.debug.table_from_markdown(md)
-    print("\n=== Extracted Info (Pathway debug table) ===\n")
-    pw.debug.compute_and_print(table)
+    # Same tables and fraud joins as the streaming pipeline (stream_kyc.py), fed straight
+    # from the extracted records
+    frame = pd.DataFrame([{'source': p, **d} for p, d in zip(paths, docs)],
+                         columns=['source', 'doc_type', 'name', 'dob', 'id_number']).fillna('')
+    with stage('pathway'):
+        table = fraud_flags(pw.debug.table_from_pandas(frame.astype(str)))
+        print("\n=== Extracted Info (Pathway) ===\n")
+        pw.debug.compute_and_print(table)
 
 
     print("\n=== Fraud Summary ===\n")
     print(summary)
 
+    if store is not None:
+        print("\n=== Cross-submission Fraud Flags ===\n")
+        for flag in store_flags:
+            print(flag)
+        print(f"{len(store_flags)} flags against {store.count()} stored records")
+        store.close()
+
+    if cache is not None:
+        print("\n=== OCR Cache ===\n")
+        print(cache.stats())
+        cache.close()
+
+    print("\n=== Stage Timings ===\n")
+    PROFILER.print_summary()
+    for doc, ms in PROFILER.slow_documents(args.slow_doc_ms):
+        print(f"SLOW DOCUMENT {doc}: {ms:.0f} ms (threshold {args.slow_doc_ms:.0f} ms)")
+    if args.profile:
+        PROFILER.write(args.profile)
+        print(f"Profile written to: {args.profile} (Chrome trace; open in chrome://tracing or Perfetto)")
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('files', nargs='+', help='Paths to document image/pdf/text files')
+    parser.add_argument('--workers', type=int, default=None, help='OCR worker processes (default: all cores)')
+    parser.add_argument('--ocr-mode', choices=['full', 'roi'], default='full', help="'roi' OCRs ID-card regions first and falls back to full page")
+    parser.add_argument('--ocr-cache', default=None, help='SQLite file caching OCR results by document content')
+    parser.add_argument('--ocr-cache-mb', type=int, default=256, help='Size cap of the OCR cache in MB (LRU eviction)')
+    parser.add_argument('--kyc-store', default=None, help='SQLite KYC record store; checks each document against all past submissions')
+    parser.add_argument('--profile', default=None, help='Write a per-stage JSON report with Chrome trace events to this file')
+    parser.add_argument('--slow-doc-ms', type=float, default=10000, help='Report documents whose processing took longer than this')
     args = parser.parse_args()
     main(args)
\ No newline at end of file
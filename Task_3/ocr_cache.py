@@ -0,0 +1,154 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+
+class OCRCache:
+    # Content-addressed OCR result store in SQLite. Entries are keyed by a hash of the file
+    # bytes plus the OCR settings, so a resubmitted scan hits regardless of its filename,
+    # while a settings change never serves stale text. Total text size is capped and the
+    # least recently used entries are evicted first.
+    def __init__(self, db_path: str = 'ocr_cache.db', max_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # (path, size, mtime) -> content key, so unchanged files are not re-hashed in-process
+        self._keys = {}
+        self._touched = {}
+        self._pending = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_ocr_cache_access ON ocr_cache (last_access)')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+        # running byte total of the cached text, kept by triggers so it stays exact when
+        # several processes share the file (seeded from the table on first use)
+        self.conn.execute('''
+            INSERT OR IGNORE INTO ocr_cache_stats (name, value)
+            SELECT 'bytes', COALESCE(SUM(size), 0) FROM ocr_cache
+        ''')
+        self.conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS ocr_cache_bytes_insert AFTER INSERT ON ocr_cache BEGIN
+                UPDATE ocr_cache_stats SET value = value + NEW.size WHERE name = 'bytes';
+            END
+        ''')
+        self.conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS ocr_cache_bytes_update AFTER UPDATE OF size ON ocr_cache BEGIN
+                UPDATE ocr_cache_stats SET value = value + NEW.size - OLD.size WHERE name = 'bytes';
+            END
+        ''')
+        self.conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS ocr_cache_bytes_delete AFTER DELETE ON ocr_cache BEGIN
+                UPDATE ocr_cache_stats SET value = value - OLD.size WHERE name = 'bytes';
+            END
+        ''')
+        self.conn.commit()
+
+    def key(self, path: str, settings: str) -> str:
+        st = os.stat(path)
+        memo = (os.path.abspath(path), st.st_size, st.st_mtime_ns, settings)
+        k = self._keys.get(memo)
+        if k is None:
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            h.update(b'\0' + settings.encode())
+            k = self._keys[memo] = h.hexdigest()
+        return k
+
+    def get(self, key: str):
+        # A hit is one indexed read; access times and counters are written back in flush(),
+        # so lookups never take the write lock.
+        row = self.conn.execute('SELECT text FROM ocr_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            self._pending['misses'] += 1
+            return None
+        self.hits += 1
+        self._pending['hits'] += 1
+        self._touched[key] = time.time()
+        return row[0]
+
+    def put(self, key: str, text: str):
+        size = len(text.encode('utf-8'))
+        # an upsert rather than INSERT OR REPLACE: REPLACE's implicit delete skips the delete trigger
+        self.conn.execute(
+            'INSERT INTO ocr_cache (key, text, size, last_access) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET text = excluded.text, size = excluded.size, '
+            'last_access = excluded.last_access',
+            (key, text, size, time.time())
+        )
+        # pending hits first, so recently hit entries are not evicted as least recently used
+        self._write_touched()
+        self._evict()
+        self.flush()
+
+    def _write_touched(self):
+        self.conn.executemany('UPDATE ocr_cache SET last_access = ? WHERE key = ?',
+                              [(ts, k) for k, ts in self._touched.items()])
+        self._touched.clear()
+
+    def flush(self):
+        self._write_touched()
+        for name, n in self._pending.items():
+            if n:
+                self.conn.execute(
+                    'INSERT INTO ocr_cache_stats (name, value) VALUES (?, ?) '
+                    'ON CONFLICT(name) DO UPDATE SET value = value + ?', (name, n, n)
+                )
+                self._pending[name] = 0
+        self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT value FROM ocr_cache_stats WHERE name = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # walk entries from least recently used and drop until back under the cap
+        victims = []
+        for key, size in self.conn.execute('SELECT key, size FROM ocr_cache ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self.conn.executemany('DELETE FROM ocr_cache WHERE key = ?', victims)
+        self._pending['evictions'] += len(victims)
+
+    def stats(self) -> dict:
+        # Session counters plus lifetime counters shared by every process using this file.
+        self.flush()
+        lifetime = dict(self.conn.execute('SELECT name, value FROM ocr_cache_stats').fetchall())
+        entries = self.conn.execute('SELECT COUNT(*) FROM ocr_cache').fetchone()[0]
+        total = self.hits + self.misses
+        life_hits, life_misses = lifetime.get('hits', 0), lifetime.get('misses', 0)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'lifetime_hits': life_hits,
+            'lifetime_misses': life_misses,
+            'lifetime_hit_rate': life_hits / (life_hits + life_misses) if life_hits + life_misses else 0.0,
+            'evictions': lifetime.get('evictions', 0),
+            'entries': entries,
+            'bytes': lifetime.get('bytes', 0),
+            'max_bytes': self.max_bytes,
+        }
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -2,45 +2,125 @@ from PIL import Image
 import pytesseract
 import fitz # PyMuPDF
 from pathlib import Path
-import tempfile
-import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+from roi_ocr import id_card_to_text
+from profiling import PROFILER, stage, count
+
+# PDF rasterization: aim for this many pixels on the longer page side
+PDF_TARGET_PX = 2400
+PDF_MIN_DPI = 100
+PDF_MAX_DPI = 300
 
 def image_to_text(path: str) -> str:
     # Run OCR on an image file and return extracted text.
-    img = Image.open(path).convert("RGB")
+    with stage('decode'):
+        img = Image.open(path).convert("RGB")
     # Basic pre-processing can be added here (grayscale, thresholding)
-    text = pytesseract.image_to_string(img)
+    with stage('tesseract'):
+        text = pytesseract.image_to_string(img)
     return text
 
-def pdf_to_text(path: str) -> str:
+def _render_page(page):
+    # Rasterize to 8-bit grayscale (a third of the RGB bytes, and tesseract binarizes anyway).
+    # The DPI is chosen so the longer page side lands near PDF_TARGET_PX: ~200 dpi on
+    # A4/Letter, more for small card-sized pages, less for oversized scans.
+    longest_in = max(page.rect.width, page.rect.height) / 72
+    dpi = int(min(PDF_MAX_DPI, max(PDF_MIN_DPI, PDF_TARGET_PX / longest_in)))
+    with stage('pdf_render'):
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return pix, pix.samples_mv
+
+
+def _ocr_pixmap(pix, samples) -> str:
+    # PIL wraps the pixmap's own sample buffer (no copy, no temp file); the image must be
+    # dropped before the pixmap so MuPDF can release that buffer.
+    img = Image.frombuffer("L", (pix.width, pix.height), samples, "raw", "L", pix.stride, 1)
+    try:
+        with stage('tesseract'):
+            return pytesseract.image_to_string(img)
+    finally:
+        del img
+
+
+def _page_to_text(page) -> str:
+    # try to extract direct text first
+    with stage('pdf_text'):
+        txt = page.get_text()
+    if txt and txt.strip():
+        return txt
+    # otherwise render page as image and OCR
+    return _ocr_pixmap(*_render_page(page))
+
+
+def pdf_to_text(path: str, workers: int = None) -> str:
     # Extract images/text from PDF: convert pages to images and OCR them.
-    doc = fitz.open(path)
+    # MuPDF is not thread-safe, so pages are rendered on this thread while tesseract
+    # (a subprocess, GIL released) OCRs earlier pages on a small thread pool.
+    workers = workers or min(4, os.cpu_count() or 1)
     full_text = []
-    for page in doc:
-        # try to extract direct text first
-        txt = page.get_text()
-        if txt and txt.strip():
-            full_text.append(txt)
-            continue
-        # otherwise render page as image and OCR
-        pix = page.get_pixmap(dpi=200)
-        img_bytes = pix.tobytes("ppm")
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        # PIL can read from bytes; but easiest to write to temp file
-        with tempfile.NamedTemporaryFile(suffix=".png") as tmp:
-            tmp.write(img_bytes)
-            tmp.flush()
-            ocr = pytesseract.image_to_string(Image.open(tmp.name))
-            full_text.append(ocr)
-    return "\n".join(full_text)
-
-
-def file_to_text(path: str) -> str:
+    with fitz.open(path) as doc, ThreadPoolExecutor(max_workers=workers) as pool:
+        inflight = deque()
+        for page in doc:
+            with stage('pdf_text'):
+                txt = page.get_text()
+            if txt and txt.strip():
+                full_text.append(txt)
+                continue
+            # bound rendered-but-not-OCRed pages so long statements don't pile up in memory
+            while len(inflight) >= workers * 2:
+                inflight.popleft().result()
+            fut = pool.submit(PROFILER.bind(_ocr_pixmap), *_render_page(page))
+            inflight.append(fut)
+            full_text.append(fut)
+        return "\n".join(t if isinstance(t, str) else t.result() for t in full_text)
+
+
+def pdf_page_to_text(path: str, page_no: int) -> str:
+    # Single-page variant used by the batch pipeline to spread PDF pages over workers.
+    with fitz.open(path) as doc:
+        return _page_to_text(doc[page_no])
+
+
+IMAGE_SUFFIXES = ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']
+
+
+def ocr_settings(mode: str = 'full') -> str:
+    # Everything that changes OCR output for the same file bytes; part of the cache key.
+    return f"tesseract|mode={mode}|pdf_px={PDF_TARGET_PX}|dpi={PDF_MIN_DPI}-{PDF_MAX_DPI}|gray"
+
+
+def needs_ocr(path: str) -> bool:
+    return Path(path).suffix.lower() in IMAGE_SUFFIXES + ['.pdf']
+
+
+def _file_to_text(path: str, mode: str = 'full', pdf_workers: int = None) -> str:
     p = Path(path)
     suf = p.suffix.lower()
-    if suf in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+    if suf in IMAGE_SUFFIXES:
+        if mode == 'roi':
+            # ID-card regions first, full page only when a field is missing
+            return id_card_to_text(str(path))
         return image_to_text(str(path))
     if suf in ['.pdf']:
-        return pdf_to_text(str(path))
+        return pdf_to_text(str(path), workers=pdf_workers)
     # fallback: read as text file
-    return p.read_text(encoding='utf-8', errors='ignore')
\ No newline at end of file
+    return p.read_text(encoding='utf-8', errors='ignore')
+
+
+def file_to_text(path: str, cache=None, mode: str = 'full', pdf_workers: int = None) -> str:
+    # With an OCRCache, documents seen before (by content) skip tesseract entirely.
+    # pdf_workers caps the per-PDF OCR thread pool (see pdf_to_text).
+    if cache is None or not needs_ocr(path):
+        return _file_to_text(path, mode, pdf_workers)
+    with stage('cache_get'):
+        key = cache.key(str(path), ocr_settings(mode))
+        text = cache.get(key)
+    count('cache_hits' if text is not None else 'cache_misses')
+    if text is None:
+        text = _file_to_text(path, mode, pdf_workers)
+        with stage('cache_put'):
+            cache.put(key, text)
+    return text
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# latency histogram buckets: bucket i holds durations in [2**(i-1), 2**i) microseconds
+BUCKETS = 40
+
+
+class Profiler:
+    # Per-stage timers, counters and latency histograms for the document pipeline.
+    # Always on: a stage costs two clock reads and a locked dict update, nothing next to
+    # a tesseract call. With trace=True every stage is also kept as a Chrome trace event.
+    # Worker processes report through snapshot() and the parent merge()s them, so one
+    # report covers the whole pool.
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.stages = {}  # name -> [count, total_ns, min_ns, max_ns, histogram]
+        self.counters = {}
+        self.docs = {}  # document -> total ns spent on it
+        self.events = []
+        # document being worked on, per thread: pool threads must not see the main thread's
+        self._local = threading.local()
+
+    @property
+    def current(self):
+        return getattr(self._local, 'doc', None)
+
+    def _event(self, name: str, start_ns: int, dur_ns: int, doc=None):
+        self.events.append({
+            'name': name, 'ph': 'X', 'ts': start_ns / 1000, 'dur': dur_ns / 1000,
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+            'args': {'doc': str(doc)} if doc is not None else {},
+        })
+
+    @staticmethod
+    def _bucket(dur_ns: int) -> int:
+        return min(BUCKETS - 1, (dur_ns // 1000).bit_length())
+
+    def _record(self, name: str, start_ns: int, dur_ns: int, doc=None):
+        with self._lock:
+            s = self.stages.get(name)
+            if s is None:
+                s = self.stages[name] = [0, 0, dur_ns, dur_ns, [0] * BUCKETS]
+            s[0] += 1
+            s[1] += dur_ns
+            s[2] = min(s[2], dur_ns)
+            s[3] = max(s[3], dur_ns)
+            s[4][self._bucket(dur_ns)] += 1
+            if self.trace:
+                self._event(name, start_ns, dur_ns, doc)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter_ns() - start, self.current)
+
+    @contextmanager
+    def document(self, doc):
+        # Time spent on one document; a document handled in several pieces (PDF pages
+        # on different workers, then extraction) adds up across them.
+        previous, self._local.doc = self.current, doc
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            dur = time.perf_counter_ns() - start
+            self._local.doc = previous
+            with self._lock:
+                self.docs[doc] = self.docs.get(doc, 0) + dur
+                if self.trace:
+                    self._event('document', start, dur, doc)
+
+    def bind(self, fn):
+        # fn wrapped to run under the calling thread's current document, for work handed
+        # to a thread pool (its time still counts only once, in the caller's document())
+        doc = self.current
+
+        def run(*args, **kwargs):
+            previous, self._local.doc = self.current, doc
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.doc = previous
+        return run
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'stages': {k: [v[0], v[1], v[2], v[3], list(v[4])] for k, v in self.stages.items()},
+                'counters': dict(self.counters),
+                'docs': dict(self.docs),
+                'events': list(self.events),
+            }
+
+    def merge(self, snap: dict):
+        with self._lock:
+            for name, (n, total, lo, hi, hist) in snap['stages'].items():
+                s = self.stages.get(name)
+                if s is None:
+                    self.stages[name] = [n, total, lo, hi, list(hist)]
+                    continue
+                s[0] += n
+                s[1] += total
+                s[2] = min(s[2], lo)
+                s[3] = max(s[3], hi)
+                s[4] = [a + b for a, b in zip(s[4], hist)]
+            for name, n in snap['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+            for doc, ns in snap['docs'].items():
+                self.docs[doc] = self.docs.get(doc, 0) + ns
+            self.events.extend(snap['events'])
+
+    @staticmethod
+    def _percentile(hist, q):
+        # upper edge of the bucket holding the q-th quantile, in ms
+        target = q * sum(hist)
+        seen = 0
+        for i, n in enumerate(hist):
+            seen += n
+            if n and seen >= target:
+                return (1 << i) / 1000
+        return 0.0
+
+    @staticmethod
+    def _stats(n, total, lo, hi, hist) -> dict:
+        return {
+            'count': n,
+            'total_ms': total / 1e6,
+            'mean_ms': total / n / 1e6,
+            'min_ms': lo / 1e6,
+            'max_ms': hi / 1e6,
+            'p50_ms': Profiler._percentile(hist, 0.5),
+            'p95_ms': min(hi / 1e6, Profiler._percentile(hist, 0.95)),
+            'p99_ms': min(hi / 1e6, Profiler._percentile(hist, 0.99)),
+            'histogram_us_log2': hist,
+        }
+
+    def summary(self) -> dict:
+        # 'document' is the per-document latency: all the pieces of one document summed
+        with self._lock:
+            stages = {name: self._stats(*s) for name, s in self.stages.items()}
+            if self.docs:
+                totals = list(self.docs.values())
+                hist = [0] * BUCKETS
+                for ns in totals:
+                    hist[self._bucket(ns)] += 1
+                stages['document'] = self._stats(len(totals), sum(totals), min(totals), max(totals), hist)
+            return {'stages': stages, 'counters': dict(self.counters),
+                    'documents_ms': {str(d): ns / 1e6 for d, ns in self.docs.items()}}
+
+    def slow_documents(self, threshold_ms: float) -> list:
+        with self._lock:
+            return sorted(((str(d), ns / 1e6) for d, ns in self.docs.items() if ns / 1e6 > threshold_ms),
+                          key=lambda x: -x[1])
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"{'stage':<14}{'count':>7}{'total ms':>12}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, s in sorted(summary['stages'].items(), key=lambda kv: -kv[1]['total_ms']):
+            print(f"{name:<14}{s['count']:>7}{s['total_ms']:>12.1f}{s['mean_ms']:>10.2f}"
+                  f"{s['p95_ms']:>10.2f}{s['max_ms']:>10.2f}")
+        if summary['counters']:
+            print(summary['counters'])
+
+    def write(self, path: str):
+        # Chrome trace (chrome://tracing, Perfetto) with the stage summary alongside the events
+        report = {'traceEvents': self.events, 'displayTimeUnit': 'ms', 'summary': self.summary()}
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report))
+
+
+PROFILER = Profiler()
+stage = PROFILER.stage
+count = PROFILER.count
@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import os
+import threading
+import pathway as pw
+
+from extract_utils import generic_extract, normalize_name
+from fraud_check import names_similar
+from ocr_cache import OCRCache
+from ocr_utils import file_to_text
+from profiling import PROFILER
+
+
+def make_extractor(cache_path=None, cache_mb=256, mode='full', workers=4):
+    # UDF mapping one uploaded file to its extracted fields. OCR runs on a thread pool of
+    # `workers` (tesseract is a subprocess, so threads overlap fine); SQLite connections
+    # cannot cross threads, so each worker thread opens its own handle on the OCR cache.
+    # `workers` is the only parallelism: each call OCRs a PDF's pages one at a time and
+    # every tesseract process gets a single OpenMP thread, so at most `workers` tesseract
+    # threads run at once.
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    local = threading.local()
+
+    def _cache():
+        if cache_path and not hasattr(local, 'cache'):
+            local.cache = OCRCache(cache_path, max_bytes=cache_mb * 1024 * 1024)
+        return getattr(local, 'cache', None)
+
+    def _extract(path):
+        with PROFILER.document(path):
+            info = generic_extract(file_to_text(path, cache=_cache(), mode=mode, pdf_workers=1))
+        return {
+            'doc_type': info.get('doc_type') or '',
+            'name': normalize_name(info.get('name') or ''),
+            'dob': info.get('dob') or '',
+            'id_number': info.get('id_number') or '',
+        }
+
+    @pw.udf(executor=pw.udfs.async_executor(capacity=workers))
+    async def extract_document(path: str) -> pw.Json:
+        return pw.Json(await asyncio.to_thread(_extract, path))
+
+    return extract_document
+
+
+@pw.udf
+def name_tokens(name: str) -> list[str]:
+    return sorted(set(name.split()))
+
+
+@pw.udf
+def name_conflict(name: str, names: tuple) -> bool:
+    return bool(name) and any(n and not names_similar(name, n) for n in names)
+
+
+@pw.udf
+def dob_conflict(dob: str, dobs: tuple) -> bool:
+    return bool(dob) and any(d and d != dob for d in dobs)
+
+
+@pw.udf
+def other_ids(id_number: str, ids: tuple) -> int:
+    return sum(1 for i in ids if i != id_number)
+
+
+def documents(files, extract_document):
+    # One row per uploaded file: source path plus the extracted fields ('' when missing).
+    files = files.select(source=pw.coalesce(pw.this._metadata["path"].as_str(), ""))
+    files = files.select(pw.this.source, info=extract_document(pw.this.source))
+    return files.select(
+        pw.this.source,
+        doc_type=pw.coalesce(pw.this.info["doc_type"].as_str(), ""),
+        name=pw.coalesce(pw.this.info["name"].as_str(), ""),
+        dob=pw.coalesce(pw.this.info["dob"].as_str(), ""),
+        id_number=pw.coalesce(pw.this.info["id_number"].as_str(), ""),
+    )
+
+
+def fraud_flags(docs):
+    # The KYCStore checks as incremental joins and reductions over the documents table
+    # (source, doc_type, name, dob, id_number); a new file only updates the groups it
+    # falls into, and the flags of earlier documents are revised when it conflicts with them.
+    with_id = docs.filter(pw.this.id_number != "")
+    by_id = with_id.groupby(pw.this.id_number).reduce(
+        pw.this.id_number,
+        names=pw.reducers.tuple(pw.this.name),
+        dobs=pw.reducers.tuple(pw.this.dob),
+    )
+    id_checks = with_id.join(by_id, pw.left.id_number == pw.right.id_number).select(
+        source=pw.left.source,
+        id_name_mismatch=name_conflict(pw.left.name, pw.right.names),
+        id_dob_mismatch=dob_conflict(pw.left.dob, pw.right.dobs),
+    )
+
+    # names_similar matches on a shared token, so grouping by (token, dob, doc_type) finds
+    # every similar-name, same-DOB document
+    tokens = docs.filter((pw.this.dob != "") & (pw.this.id_number != "")).select(
+        pw.this.source, pw.this.doc_type, pw.this.dob, pw.this.id_number,
+        token=name_tokens(pw.this.name),
+    ).flatten(pw.this.token)
+    by_identity = tokens.groupby(pw.this.token, pw.this.dob, pw.this.doc_type).reduce(
+        pw.this.token, pw.this.dob, pw.this.doc_type,
+        ids=pw.reducers.tuple(pw.this.id_number),
+    )
+    identity = tokens.join(
+        by_identity,
+        pw.left.token == pw.right.token, pw.left.dob == pw.right.dob, pw.left.doc_type == pw.right.doc_type,
+    ).select(
+        source=pw.left.source,
+        others=other_ids(pw.left.id_number, pw.right.ids),
+    ).groupby(pw.this.source).reduce(
+        pw.this.source,
+        identity_multiple_ids=pw.reducers.sum(pw.this.others) > 0,
+    )
+
+    flagged = docs.join_left(id_checks, pw.left.source == pw.right.source).select(
+        *pw.left,
+        id_name_mismatch=pw.coalesce(pw.right.id_name_mismatch, False),
+        id_dob_mismatch=pw.coalesce(pw.right.id_dob_mismatch, False),
+    )
+    flagged = flagged.join_left(identity, pw.left.source == pw.right.source).select(
+        *pw.left,
+        identity_multiple_ids=pw.coalesce(pw.right.identity_multiple_ids, False),
+    )
+    return flagged.select(
+        *pw.this,
+        flagged=pw.this.id_name_mismatch | pw.this.id_dob_mismatch | pw.this.identity_multiple_ids,
+    )
+
+
+def main(args):
+    files = pw.io.fs.read(
+        args.input,
+        format="binary",
+        with_metadata=True,
+        mode="static" if args.static else "streaming",
+    )
+    extract_document = make_extractor(args.ocr_cache, args.ocr_cache_mb, args.ocr_mode, args.workers)
+    results = fraud_flags(documents(files, extract_document))
+    # one line per document as soon as it is verified; earlier lines are retracted and
+    # re-emitted (diff -1/+1) when a later upload changes their flags
+    pw.io.jsonlines.write(results, args.output)
+    pw.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming KYC verification of an upload directory with Pathway")
+    parser.add_argument("--input", required=True, help="Upload directory to watch")
+    parser.add_argument("--output", default="kyc_results.jsonl", help="JSON-lines file receiving per-document results")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent OCR calls")
+    parser.add_argument("--ocr-mode", choices=["full", "roi"], default="full", help="'roi' OCRs ID-card regions first")
+    parser.add_argument("--ocr-cache", default=None, help="SQLite file caching OCR results by document content")
+    parser.add_argument("--ocr-cache-mb", type=int, default=256, help="Size cap of the OCR cache in MB")
+    parser.add_argument("--static", action="store_true", help="Process the files present now and exit")
+    args = parser.parse_args()
+    main(args)
@@ -1,7 +1,11 @@
+import os
+import uuid
 import streamlit as st
 from llm_handler import LLMHandler
 from database import Database
 from entity_extractor import EntityExtractor
+from response_cache import ResponseCache
+from scheduler import RequestScheduler
 
 # Page configuration
 st.set_page_config(
@@ -10,21 +14,38 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize components
+# Initialize components shared by all sessions
 @st.cache_resource
 def init_components():
-    llm = LLMHandler()
+    # answers to standalone questions are shared by all sessions; EMBED_MODEL (e.g.
+    # nomic-embed-text) switches matching from hashed n-grams to Ollama embeddings
+    cache = ResponseCache(embed_model=os.getenv("EMBED_MODEL"))
+    # one queue in front of Ollama: LLM_MAX_INFLIGHT generations at once (match
+    # OLLAMA_NUM_PARALLEL), LLM_MAX_QUEUE waiting, the rest are told to retry
+    scheduler = RequestScheduler(
+        max_inflight=int(os.getenv("LLM_MAX_INFLIGHT", "1")),
+        max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+        queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "60")),
+    )
+    LLMHandler().warm_up()
     db = Database()
     extractor = EntityExtractor()
-    return llm, db, extractor
+    return cache, scheduler, db, extractor
 
-llm, db, extractor = init_components()
+cache, scheduler, db, extractor = init_components()
 
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state.messages = []
+if 'user_id' not in st.session_state:
+    # every browser session gets its own user row, so profiles don't overwrite each other
+    st.session_state.user_id = db.get_or_create_user(uuid.uuid4().hex)
+if 'llm' not in st.session_state:
+    # and its own conversation context
+    st.session_state.llm = LLMHandler(cache=cache, scheduler=scheduler, session_id=st.session_state.user_id)
+llm = st.session_state.llm
 if 'user_details' not in st.session_state:
-    st.session_state.user_details = db.get_user_details()
+    st.session_state.user_details = db.get_user_details(st.session_state.user_id)
 
 # Sidebar
 with st.sidebar:
@@ -51,6 +72,11 @@ with st.sidebar:
         st.rerun()
     
     st.divider()
+    stats = cache.stats()
+    st.caption(f"Response cache: {stats['hit_rate']:.0%} hit rate, {stats['entries']} answers")
+    load = scheduler.stats()
+    st.caption(f"LLM queue: {load['inflight']} generating, {load['queue_depth']} waiting, "
+               f"{load['rejected'] + load['timed_out']} turned away")
     st.caption("Powered by Llama 3.1 (Local)")
 
 # Main chat interface
@@ -75,23 +101,22 @@ if prompt := st.chat_input("Ask your financial question..."):
     # Save user details if found
     if entities['name'] or entities['email'] or entities['phone']:
         db.save_user_details(
+            st.session_state.user_id,
             name=entities['name'],
             email=entities['email'],
             phone=entities['phone']
         )
-        st.session_state.user_details = db.get_user_details()
+        st.session_state.user_details = db.get_user_details(st.session_state.user_id)
     
-    # Get bot response
+    # Stream the bot response as it is generated; write_stream returns the full text
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            response = llm.chat(prompt)
-            st.markdown(response)
+        response = st.write_stream(llm.chat_stream(prompt))
     
     # Add assistant response to chat
     st.session_state.messages.append({"role": "assistant", "content": response})
     
     # Save conversation to database
-    db.save_conversation(prompt, response, entities)
+    db.save_conversation(st.session_state.user_id, prompt, response, entities)
     
     # Show extracted info (for demo purposes)
     if entities['name'] or entities['email'] or entities['phone']:
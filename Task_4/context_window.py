@@ -0,0 +1,117 @@
+import threading
+
+
+def estimate_tokens(text):
+    """Rough Llama token count (~4 characters per token), no tokenizer needed"""
+    return len(text) // 4 + 1
+
+
+class ContextWindow:
+    """Conversation history that fits a token budget.
+
+    The prompt is [system prompt + summary of older turns] followed by the recent turns
+    verbatim. Between compactions new turns are only appended, so every request starts
+    with the previous request's prompt and Ollama reuses its cached prefix instead of
+    re-processing the whole conversation. Once the prompt passes `budget_tokens`, the
+    oldest turns are folded into the summary until it is back under
+    `low_water * budget_tokens`; folding a large chunk at once keeps compactions (and
+    prefix changes) rare. The summary is written on a background thread after a reply,
+    so no turn waits for it.
+    """
+
+    def __init__(self, budget_tokens=3072, low_water=0.6, summarize=None, count_tokens=estimate_tokens):
+        self.budget_tokens = budget_tokens
+        self.low_water = low_water
+        self.summarize = summarize
+        self.count_tokens = count_tokens
+        self._lock = threading.Lock()
+        self._compacting = None
+        self._generation = 0
+        self.reset()
+
+    def reset(self):
+        """Clear conversation history"""
+        self._generation += 1
+        self.turns = []  # (message dict, token count)
+        self.summary = ''
+        self.summary_tokens = 0
+
+    def add(self, role, content):
+        with self._lock:
+            self.turns.append(({'role': role, 'content': content}, self.count_tokens(content)))
+
+    @property
+    def history(self):
+        """Turns still kept verbatim"""
+        with self._lock:
+            return [m for m, _ in self.turns]
+
+    def _prefix(self, system_prompt):
+        if not self.summary:
+            return system_prompt
+        return f"{system_prompt}\n\nSummary of the earlier conversation:\n{self.summary}"
+
+    def messages(self, system_prompt):
+        """Messages for the next request: stable prefix, then recent turns"""
+        with self._lock:
+            return [{'role': 'system', 'content': self._prefix(system_prompt)}] + [m for m, _ in self.turns]
+
+    def tokens(self, system_prompt):
+        with self._lock:
+            return self.count_tokens(self._prefix(system_prompt)) + sum(n for _, n in self.turns)
+
+    def _to_fold(self, system_prompt):
+        # oldest turns to fold so the prompt drops to the low-water mark; the newest
+        # exchange is always kept verbatim
+        target = self.low_water * self.budget_tokens - self.count_tokens(system_prompt) - self.summary_tokens
+        total = sum(n for _, n in self.turns)
+        k = 0
+        while k < len(self.turns) - 2 and total > target:
+            total -= self.turns[k][1]
+            k += 1
+        # fold whole exchanges so the kept history starts with a user turn
+        while k < len(self.turns) - 2 and self.turns[k][0]['role'] != 'user':
+            k += 1
+        return k
+
+    def compact(self, system_prompt):
+        """Fold the oldest turns into the summary if the prompt is over budget"""
+        with self._lock:
+            if self.count_tokens(self._prefix(system_prompt)) + sum(n for _, n in self.turns) <= self.budget_tokens:
+                return False
+            k = self._to_fold(system_prompt)
+            folded = [m for m, _ in self.turns[:k]]
+            previous = self.summary
+            generation = self._generation
+        if not folded:
+            return False
+        summary = self._summarize(previous, folded)
+        with self._lock:
+            if generation != self._generation:
+                return False  # conversation was cleared meanwhile
+            # turns added while summarizing sit after the folded ones and are kept
+            self.turns = self.turns[k:]
+            self.summary = summary
+            self.summary_tokens = self.count_tokens(summary)
+        return True
+
+    def compact_async(self, system_prompt):
+        """compact() on a background thread, at most one at a time"""
+        if self._compacting is not None and self._compacting.is_alive():
+            return
+        self._compacting = threading.Thread(target=self.compact, args=(system_prompt,), daemon=True)
+        self._compacting.start()
+
+    def _summarize(self, previous, folded):
+        if self.summarize is not None:
+            try:
+                return self.summarize(previous, folded)
+            except Exception:
+                pass
+        # fallback without the model: keep the user's questions, clipped
+        asked = [m['content'].strip().replace('\n', ' ')[:160] for m in folded if m['role'] == 'user']
+        lines = (previous.split('\n') if previous else []) + [f"- User asked: {q}" for q in asked]
+        # the summary is part of every prompt, so it gets at most a quarter of the budget
+        while len(lines) > 1 and self.count_tokens('\n'.join(lines)) > self.budget_tokens // 4:
+            lines.pop(0)
+        return '\n'.join(lines)
@@ -1,29 +1,83 @@
 import sqlite3
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+import argparse
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers never block the writer and vice versa
+    "PRAGMA synchronous=NORMAL",    # fsync at checkpoints, not on every commit
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",     # 16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",
+)
+
 
 class Database:
-    def __init__(self, db_path="data/chatbot.db"):
+    """SQLite storage shared by every chat session.
+
+    Reads borrow a connection from a small pool of long-lived connections. All writes
+    go through one background writer thread that owns the only write connection and
+    group-commits whatever queued up while the previous commit was in flight, so
+    conversation inserts return immediately and concurrent sessions never fight over
+    the write lock.
+    """
+
+    def __init__(self, db_path="data/chatbot.db", pool_size=4, batch_size=256):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self._sessions = {}  # session_key -> user id
+        self._writes = queue.Queue()
+        self._readers = queue.Queue()
         self.init_database()
-    
+        for _ in range(pool_size):
+            self._readers.put(self._connect())
+        self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
     def init_database(self):
         """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
-        
-        # Users table
+
+        # Users table: one row per chat session (session_key), so profiles stay separate
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_key TEXT,
                 name TEXT,
                 email TEXT,
                 phone TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(users)")]
+        if 'session_key' not in columns:
+            # databases from the single-user version keep their row, without a session
+            cursor.execute("ALTER TABLE users ADD COLUMN session_key TEXT")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_session ON users (session_key)")
+
         # Conversations table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS conversations (
@@ -36,86 +90,241 @@ class Database:
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
-        
+        # history reads walk one user's rows newest first (the rowid rides along in the
+        # index and breaks created_at ties); retention scans by age
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_user_created ON conversations (user_id, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_created ON conversations (created_at)")
+
+        # Rows moved out by archive_conversations()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversations_archive (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER,
+                message TEXT,
+                response TEXT,
+                entities TEXT,
+                created_at TIMESTAMP
+            )
+        ''')
+
         conn.commit()
         conn.close()
-    
-    def save_user_details(self, name=None, email=None, phone=None):
-        """Save or update user details"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if user exists
-        cursor.execute("SELECT id FROM users LIMIT 1")
-        user = cursor.fetchone()
-        
-        if user:
-            # Update existing user
-            user_id = user[0]
+
+    def _write_loop(self):
+        """Writer thread: run queued writes in order, one commit per batch.
+
+        Each job runs inside its own savepoint, so a job that raises leaves nothing
+        behind in the shared transaction; if the commit itself fails the whole batch is
+        rolled back and every job in it gets the error.
+        """
+        conn = self._connect()
+        conn.isolation_level = None  # transactions are managed explicitly below
+        stop = False
+        while not stop:
+            batch = [self._writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            done = []
+            conn.execute("BEGIN")
+            for job in batch:
+                if job is None:
+                    stop = True
+                    continue
+                fn, future = job
+                conn.execute("SAVEPOINT job")
+                try:
+                    result = fn(conn)
+                    conn.execute("RELEASE job")
+                    done.append((future, result))
+                except Exception as e:
+                    self._fail(future, e)
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK TO job")
+                        conn.execute("RELEASE job")
+                    else:
+                        # SQLite rolled back the whole transaction (e.g. disk full): the
+                        # jobs run before this one are gone too
+                        for earlier, _ in done:
+                            self._fail(earlier, e)
+                        done = []
+                        conn.execute("BEGIN")
+            try:
+                conn.execute("COMMIT")
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                for future, _ in done:
+                    self._fail(future, e)
+                continue
+            for future, result in done:
+                if future is not None:
+                    future.set_result(result)
+        conn.close()
+
+    @staticmethod
+    def _fail(future, error):
+        if future is not None:
+            future.set_exception(error)
+        else:
+            print(f"Database write failed: {error}")
+
+    def _write(self, fn, wait=True):
+        """Queue fn(conn) on the writer; with wait, block until it is committed and return its result"""
+        future = Future() if wait else None
+        self._writes.put((fn, future))
+        return future.result() if wait else None
+
+    def flush(self):
+        """Block until every queued write is committed"""
+        self._write(lambda conn: None)
+
+    def close(self):
+        """Commit pending writes and close all connections"""
+        if not self._writer.is_alive():
+            return
+        self._writes.put(None)
+        self._writer.join()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    def get_or_create_user(self, session_key):
+        """Return the user id for a chat session, creating its row on first use"""
+        user_id = self._sessions.get(session_key)
+        if user_id is None:
+            def write(conn):
+                conn.execute("INSERT OR IGNORE INTO users (session_key) VALUES (?)", (session_key,))
+                return conn.execute("SELECT id FROM users WHERE session_key = ?", (session_key,)).fetchone()[0]
+            user_id = self._sessions[session_key] = self._write(write)
+        return user_id
+
+    def save_user_details(self, user_id, name=None, email=None, phone=None):
+        """Update a user's profile fields (only the ones given)"""
+        def write(conn):
+            cursor = conn.cursor()
             if name:
                 cursor.execute("UPDATE users SET name = ? WHERE id = ?", (name, user_id))
             if email:
                 cursor.execute("UPDATE users SET email = ? WHERE id = ?", (email, user_id))
             if phone:
                 cursor.execute("UPDATE users SET phone = ? WHERE id = ?", (phone, user_id))
-        else:
-            # Create new user
-            cursor.execute(
-                "INSERT INTO users (name, email, phone) VALUES (?, ?, ?)",
-                (name, email, phone)
-            )
-            user_id = cursor.lastrowid
-        
-        conn.commit()
-        conn.close()
-        return user_id
-    
-    def save_conversation(self, user_message, bot_response, extracted_entities):
-        """Save conversation to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get or create user
-        cursor.execute("SELECT id FROM users LIMIT 1")
-        user = cursor.fetchone()
-        user_id = user[0] if user else self.save_user_details()
-        
-        # Save conversation
-        cursor.execute(
-            "INSERT INTO conversations (user_id, message, response, entities) VALUES (?, ?, ?, ?)",
-            (user_id, user_message, bot_response, json.dumps(extracted_entities))
-        )
-        
-        conn.commit()
-        conn.close()
-    
-    def get_user_details(self):
+            return user_id
+
+        return self._write(write)
+
+    def save_conversation(self, user_id, user_message, bot_response, extracted_entities):
+        """Queue a conversation turn; returns without waiting for the disk"""
+        # timestamp the turn now, not when the writer gets to it
+        row = (user_id, user_message, bot_response, json.dumps(extracted_entities),
+               datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+        self._write(lambda conn: conn.execute(
+            "INSERT INTO conversations (user_id, message, response, entities, created_at) VALUES (?, ?, ?, ?, ?)",
+            row
+        ), wait=False)
+
+    def get_user_details(self, user_id):
         """Retrieve user details"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name, email, phone FROM users LIMIT 1")
-        user = cursor.fetchone()
-        conn.close()
-        
-        if user:
+        with self._reader() as conn:
+            user = conn.execute("SELECT name, email, phone FROM users WHERE id = ?", (user_id,)).fetchone()
+
+        if user and any(user):
             return {
                 'name': user[0],
                 'email': user[1],
                 'phone': user[2]
             }
         return None
-    
-    def get_conversation_history(self, limit=10):
-        """Get recent conversations"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT message, response, created_at FROM conversations ORDER BY created_at DESC LIMIT ?",
-            (limit,)
-        )
-        conversations = cursor.fetchall()
-        conn.close()
-        
-        return conversations
+
+    def get_conversation_page(self, user_id, limit=10, before=None):
+        """One page of a user's conversations, newest first.
+
+        Keyset pagination: pass the returned cursor as `before` to get the next (older)
+        page. Each page is a bounded range scan on (user_id, created_at), however many
+        rows the table holds, unlike OFFSET which re-reads every skipped row.
+        Returns (rows, cursor); cursor is None after the last page.
+        """
+        sql = "SELECT message, response, created_at, id FROM conversations WHERE user_id = ?"
+        params = [user_id]
+        if before is not None:
+            sql += " AND (created_at, id) < (?, ?)"
+            params += list(before)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        cursor = (rows[-1][2], rows[-1][3]) if len(rows) == limit else None
+        return [r[:3] for r in rows], cursor
+
+    def get_conversation_history(self, user_id, limit=10):
+        """Get a user's recent conversations (turns still queued for the writer are not visible; call flush() first if needed)"""
+        return self.get_conversation_page(user_id, limit)[0]
+
+    def archive_conversations(self, older_than_days=90, batch_size=5000, delete=False):
+        """Retention job: move (or with delete, drop) conversations older than the cutoff.
+
+        Works in batches, each its own writer transaction, so chat writes keep flowing
+        while a large backlog is cleared. Returns the number of rows moved.
+        """
+        cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+        def write(conn):
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM conversations WHERE created_at < ? ORDER BY created_at LIMIT ?",
+                (cutoff, batch_size)
+            )]
+            if ids:
+                selected = json.dumps(ids)
+                if not delete:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO conversations_archive "
+                        "SELECT id, user_id, message, response, entities, created_at FROM conversations "
+                        "WHERE id IN (SELECT value FROM json_each(?))", (selected,)
+                    )
+                conn.execute("DELETE FROM conversations WHERE id IN (SELECT value FROM json_each(?))", (selected,))
+            return len(ids)
+
+        total = 0
+        while True:
+            n = self._write(write)
+            total += n
+            if n < batch_size:
+                return total
+
+    def reextract_entities(self, extract_many, batch_size=5000):
+        """Recompute the stored entities of every conversation, e.g. after the extraction rules change.
+
+        extract_many(messages) must return one entities dict per message, in order
+        (EntityExtractor.extract_many). Rows are read in id order with keyset pagination
+        and each batch is updated in one writer transaction. Returns the number of rows.
+        """
+        self.flush()
+        total, last_id = 0, 0
+        while True:
+            with self._reader() as conn:
+                rows = conn.execute(
+                    "SELECT id, message FROM conversations WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return total
+            entities = extract_many([message or '' for _, message in rows])
+            updates = [(json.dumps(e), row_id) for e, (row_id, _) in zip(entities, rows)]
+            self._write(lambda conn: conn.executemany("UPDATE conversations SET entities = ? WHERE id = ?", updates))
+            total += len(rows)
+            last_id = rows[-1][0]
+
+
+if __name__ == "__main__":
+    # Retention job, e.g. from cron: python database.py --older-than-days 90
+    parser = argparse.ArgumentParser(description="Archive or delete old FinanceBot conversations")
+    parser.add_argument("--db", default="data/chatbot.db", help="SQLite database file")
+    parser.add_argument("--older-than-days", type=int, default=90, help="Retention window in days")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per transaction")
+    parser.add_argument("--delete", action="store_true", help="Delete instead of moving to conversations_archive")
+    args = parser.parse_args()
+    db = Database(args.db)
+    n = db.archive_conversations(args.older_than_days, args.batch_size, args.delete)
+    print(f"{'Deleted' if args.delete else 'Archived'} {n} conversations older than {args.older_than_days} days")
+    db.close()
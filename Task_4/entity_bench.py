@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import re
+import sqlite3
+import time
+
+from entity_extractor import EntityExtractor
+
+
+def legacy_extract_entities(text):
+    # The former EntityExtractor.extract_entities: patterns and keyword table built on every call.
+    entities = {'name': None, 'email': None, 'phone': None, 'financial_info': []}
+    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    if emails:
+        entities['email'] = emails[0]
+    for pattern in [r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b', r'\b([0-9]{10})\b']:
+        phones = re.findall(pattern, text)
+        if phones:
+            entities['phone'] = ''.join(phones[0]) if isinstance(phones[0], tuple) else phones[0]
+            break
+    for pattern in [r"(?:my name is|i'm|i am|this is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
+                    r"^([A-Z][a-z]+\s+[A-Z][a-z]+)"]:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            entities['name'] = match.group(1)
+            break
+    for money in re.findall(r'\$?\s?(\d+(?:,\d{3})*(?:\.\d{2})?)\s?(?:dollars|USD|\$)?', text):
+        entities['financial_info'].append({'type': 'money', 'value': money})
+    financial_keywords = {
+        'loan': ['loan', 'borrow', 'mortgage', 'emi'],
+        'investment': ['invest', 'stock', 'mutual fund', 'bond', 'shares'],
+        'savings': ['save', 'savings', 'deposit', 'fixed deposit'],
+        'credit': ['credit card', 'credit score', 'credit limit']
+    }
+    text_lower = text.lower()
+    detected_categories = set()
+    for category, keywords in financial_keywords.items():
+        for keyword in keywords:
+            if keyword in text_lower and category not in detected_categories:
+                entities['financial_info'].append({'type': 'interest', 'category': category, 'keyword': keyword})
+                detected_categories.add(category)
+                break
+    return entities
+
+
+def synthetic_corpus(n, seed=0):
+    # Chat-like messages: finance questions, some with a name, contact details or amounts.
+    rng = random.Random(seed)
+    questions = ['How should I start investing in mutual funds?', 'What is a good credit score?',
+                 'Should I pay off my loan early or save more?', 'Explain how a fixed deposit works.',
+                 'Is it better to rent or take a mortgage?', 'How do bonds compare with stocks for retirement?',
+                 'What are the tax rules on capital gains?', 'How much emergency money should I keep aside?']
+    names = ['John Smith', 'Priya Sharma', 'Maria Garcia', 'Wei Chen', 'Amit Patel']
+    texts = []
+    for _ in range(n):
+        parts = [rng.choice(questions)]
+        if rng.random() < 0.2:
+            parts.insert(0, f"Hi, my name is {rng.choice(names)}.")
+        if rng.random() < 0.1:
+            parts.append(f"Reach me at user{rng.randint(1, 999)}@example.com or {rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}.")
+        if rng.random() < 0.3:
+            parts.append(f"I have ${rng.randint(1, 500):,},000 in savings and earn {rng.randint(30, 200)}000 dollars a year.")
+        texts.append(' '.join(parts))
+    return texts
+
+
+def load_corpus(args):
+    texts = []
+    if args.db:
+        conn = sqlite3.connect(args.db)
+        texts = [row[0] for row in conn.execute('SELECT message FROM conversations') if row[0]]
+        conn.close()
+    if not texts:
+        texts = synthetic_corpus(args.synthetic, seed=args.seed)
+    # repeat small corpora so timings are not dominated by timer noise
+    return (texts * (args.min_texts // len(texts) + 1))[:max(args.min_texts, len(texts))]
+
+
+def timed(label, fn, texts):
+    start = time.perf_counter()
+    out = fn(texts)
+    seconds = time.perf_counter() - start
+    print(f"  {label:<14} {seconds:8.3f}s {len(texts) / seconds:12,.0f} texts/s")
+    return out, seconds
+
+
+def main(args):
+    texts = load_corpus(args)
+    workers = args.workers or os.cpu_count() or 1
+    extractor = EntityExtractor()
+    print(f"{len(texts)} texts, {sum(map(len, texts)) / 2 ** 20:.1f} MB")
+    ref, ref_s = timed('per-call', lambda ts: [legacy_extract_entities(t) for t in ts], texts)
+    out, pre_s = timed('precompiled', lambda ts: [extractor.extract_entities(t) for t in ts], texts)
+    batch, batch_s = timed(f'batch x{workers}', lambda ts: extractor.extract_many(ts, workers=workers), texts)
+    mismatches = sum(r != o for r, o in zip(ref, out)) + sum(r != b for r, b in zip(ref, batch))
+    print(f"Speedup: precompiled {ref_s / pre_s:.1f}x, batch {ref_s / batch_s:.1f}x; mismatches: {mismatches}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Entity extraction throughput over chat messages')
+    parser.add_argument('--db', default=None, help='Read messages from this chatbot database instead of synthetic ones')
+    parser.add_argument('--synthetic', type=int, default=10000, help='Synthetic messages when no database is given')
+    parser.add_argument('--min-texts', type=int, default=100000, help='Repeat the corpus up to this many texts')
+    parser.add_argument('--workers', type=int, default=None, help='Processes for the batch run (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed')
+    args = parser.parse_args()
+    main(args)
@@ -1,13 +1,38 @@
+import argparse
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Patterns are compiled once at import; the rules are unchanged from the per-call version
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+# Phone numbers in various formats. A bare 10-digit number also matches here, so the
+# separate 10-digit pattern the extractor used to try second could never fire.
+PHONE_RE = re.compile(r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b')
+NAME_RES = (
+    re.compile(r"(?:my name is|i'm|i am|this is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", re.IGNORECASE),
+    re.compile(r"^([A-Z][a-z]+\s+[A-Z][a-z]+)", re.IGNORECASE),  # First and last name at start
+)
+MONEY_RE = re.compile(r'\$?\s?(\d+(?:,\d{3})*(?:\.\d{2})?)\s?(?:dollars|USD|\$)?')
+# Cheap scans that rule the costlier patterns out: every amount has a digit, every
+# phone number a run of three ASCII digits
+DIGIT_RE = re.compile(r'\d')
+DIGIT_RUN_RE = re.compile(r'[0-9]{3}')
+
+# Financial keywords by category; at most one hit per category, the first keyword listed wins
+FINANCIAL_KEYWORDS = {
+    'loan': ('loan', 'borrow', 'mortgage', 'emi'),
+    'investment': ('invest', 'stock', 'mutual fund', 'bond', 'shares'),
+    'savings': ('save', 'savings', 'deposit', 'fixed deposit'),
+    'credit': ('credit card', 'credit score', 'credit limit'),
+}
+
 
 class EntityExtractor:
     def __init__(self):
         # No spaCy needed - using pure regex
-        self.name_patterns = [
-            r"(?:my name is|i'm|i am|this is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
-            r"^([A-Z][a-z]+\s+[A-Z][a-z]+)",  # First and last name at start
-        ]
-    
+        self.name_patterns = NAME_RES
+        self.financial_keywords = FINANCIAL_KEYWORDS
+
     def extract_entities(self, text):
         """Extract personal information from text using regex"""
         entities = {
@@ -16,64 +41,72 @@ class EntityExtractor:
             'phone': None,
             'financial_info': []
         }
-        
+        # patterns that cannot match are skipped: no '@' means no email, no digit
+        # means no phone number or amount
+        has_digits = DIGIT_RE.search(text) is not None
+
         # Email extraction
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        if emails:
-            entities['email'] = emails[0]
-        
-        # Phone extraction (various formats)
-        phone_patterns = [
-            r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b',
-            r'\b([0-9]{10})\b'  # Simple 10-digit
-        ]
-        
-        for pattern in phone_patterns:
-            phones = re.findall(pattern, text)
-            if phones:
-                if isinstance(phones[0], tuple):
-                    entities['phone'] = ''.join(phones[0])
-                else:
-                    entities['phone'] = phones[0]
-                break
-        
+        if '@' in text:
+            match = EMAIL_RE.search(text)
+            if match:
+                entities['email'] = match.group()
+
+        # Phone extraction
+        if has_digits and DIGIT_RUN_RE.search(text):
+            match = PHONE_RE.search(text)
+            if match:
+                entities['phone'] = ''.join(match.groups())
+
         # Name extraction using patterns
         for pattern in self.name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 entities['name'] = match.group(1)
                 break
-        
+
         # Money amount extraction
-        money_pattern = r'\$?\s?(\d+(?:,\d{3})*(?:\.\d{2})?)\s?(?:dollars|USD|\$)?'
-        money_matches = re.findall(money_pattern, text)
-        for money in money_matches:
-            entities['financial_info'].append({
-                'type': 'money',
-                'value': money
-            })
-        
+        if has_digits:
+            entities['financial_info'] = [{'type': 'money', 'value': money} for money in MONEY_RE.findall(text)]
+
         # Financial keywords detection
-        financial_keywords = {
-            'loan': ['loan', 'borrow', 'mortgage', 'emi'],
-            'investment': ['invest', 'stock', 'mutual fund', 'bond', 'shares'],
-            'savings': ['save', 'savings', 'deposit', 'fixed deposit'],
-            'credit': ['credit card', 'credit score', 'credit limit']
-        }
-        
         text_lower = text.lower()
-        detected_categories = set()
-        
-        for category, keywords in financial_keywords.items():
+        for category, keywords in self.financial_keywords.items():
             for keyword in keywords:
-                if keyword in text_lower and category not in detected_categories:
+                if keyword in text_lower:
                     entities['financial_info'].append({
                         'type': 'interest',
                         'category': category,
                         'keyword': keyword
                     })
-                    detected_categories.add(category)
                     break
-        
+
         return entities
+
+    def extract_many(self, texts, workers=1, chunksize=256):
+        """extract_entities over many texts, in input order.
+
+        With workers > 1 the texts are handed to a process pool in chunks; use it when
+        re-extracting a large backlog (see Database.reextract_entities).
+        """
+        texts = list(texts)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(texts) <= chunksize:
+            return [self.extract_entities(t) for t in texts]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.extract_entities, texts, chunksize=chunksize))
+
+
+if __name__ == "__main__":
+    # Re-run extraction over stored conversations after the rules change
+    from database import Database
+
+    parser = argparse.ArgumentParser(description="Re-extract entities for every stored conversation")
+    parser.add_argument("--db", default="data/chatbot.db", help="SQLite database file")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Conversations per read/update batch")
+    args = parser.parse_args()
+    db = Database(args.db)
+    extractor = EntityExtractor()
+    n = db.reextract_entities(lambda texts: extractor.extract_many(texts, workers=args.workers), args.batch_size)
+    print(f"Re-extracted entities for {n} conversations")
+    db.close()
@@ -1,8 +1,26 @@
+import threading
+from contextlib import ExitStack, nullcontext
 import ollama
+from context_window import ContextWindow
+from scheduler import Overloaded
+
+SUMMARY_PROMPT = """Summarize this conversation between a user and FinanceBot for later reference.
+Keep the user's personal details, goals, amounts and any decisions or advice given.
+Use at most 120 words and write plain sentences."""
+
+BUSY_MESSAGE = "FinanceBot is answering a lot of questions right now. Please try again in a moment."
 
 class LLMHandler:
-    def __init__(self, model_name="llama3.1:8b"):
+    def __init__(self, model_name="llama3.1:8b", context_tokens=4096, reply_tokens=1024, cache=None,
+                 scheduler=None, session_id=None):
         self.model_name = model_name
+        # optional ResponseCache shared across sessions for standalone questions
+        self.cache = cache
+        # optional RequestScheduler shared across sessions; every generation holds one of its slots
+        self.scheduler = scheduler
+        self.session_id = session_id
+        # Ollama silently truncates prompts longer than num_ctx, so the window is sized to it
+        self.options = {'num_ctx': context_tokens}
         self.system_prompt = """You are FinanceBot, an expert AI financial advisor assistant. 
 Your role is to help users with financial queries including:
 - Banking and savings accounts
@@ -16,41 +34,129 @@ Always be helpful, clear, and provide accurate financial information.
 If you're unsure, admit it and suggest consulting a certified financial advisor.
 Keep responses concise but informative."""
         
-        self.conversation_history = []
+        self.context = ContextWindow(budget_tokens=context_tokens - reply_tokens, summarize=self._summarize)
+    
+    @property
+    def conversation_history(self):
+        """Recent turns kept verbatim (older ones live in the context summary)"""
+        return self.context.history
+    
+    def _shared_cache(self):
+        # the shared cache only sees a session's first turn: later replies are generated
+        # from its history and summary, which can carry personal details into the answer
+        if self.cache is None or self.context.history or self.context.summary:
+            return None
+        return self.cache
+    
+    def _slot(self):
+        return self.scheduler.slot(self.session_id) if self.scheduler else nullcontext()
+    
+    def _summarize(self, previous, turns):
+        """Fold turns into the running summary with the same model"""
+        transcript = '\n'.join(f"{m['role']}: {m['content']}" for m in turns)
+        if previous:
+            transcript = f"Earlier summary: {previous}\n\n{transcript}"
+        # when shed (Overloaded), the context window falls back to its extractive summary
+        with self._slot():
+            response = ollama.chat(
+                model=self.model_name,
+                messages=[{'role': 'system', 'content': SUMMARY_PROMPT}, {'role': 'user', 'content': transcript}],
+                options={**self.options, 'num_predict': 200}
+            )
+        return response['message']['content'].strip()
+    
+    def warm_up(self):
+        """Load the model in the background so the first question doesn't pay for it"""
+        def load():
+            try:
+                # an empty prompt makes Ollama load the weights and return right away
+                ollama.generate(model=self.model_name, prompt='')
+            except Exception:
+                pass
+        threading.Thread(target=load, daemon=True).start()
+    
+    def chat_stream(self, user_message):
+        """Send message to LLM and yield the response as it is generated"""
+        cache = self._shared_cache()
+        cached = cache.get(user_message) if cache else None
+        if cached is not None:
+            self.context.add('user', user_message)
+            self.context.add('assistant', cached)
+            self.context.compact_async(self.system_prompt)
+            yield cached
+            return
+        
+        with ExitStack() as stack:
+            try:
+                # the slot is held until the stream ends or the caller stops reading
+                stack.enter_context(self._slot())
+            except Overloaded:
+                # shed: the turn is not added, so the user can simply ask again
+                yield BUSY_MESSAGE
+                return
+            
+            self.context.add('user', user_message)
+            messages = self.context.messages(self.system_prompt)
+            parts = []
+            try:
+                for chunk in ollama.chat(model=self.model_name, messages=messages, stream=True, options=self.options):
+                    token = chunk['message']['content']
+                    if token:
+                        parts.append(token)
+                        yield token
+                if cache:
+                    cache.put(user_message, ''.join(parts))
+            except Exception as e:
+                if parts:
+                    yield f"\n\n[Connection to LLM lost: {str(e)}]"
+                else:
+                    yield f"Error connecting to LLM: {str(e)}"
+            finally:
+                # also runs when the caller stops early: keep whatever was said in the history
+                if parts:
+                    self.context.add('assistant', ''.join(parts))
+                self.context.compact_async(self.system_prompt)
     
     def chat(self, user_message):
         """Send message to LLM and get response"""
         try:
-            # Add user message to history
-            self.conversation_history.append({
-                'role': 'user',
-                'content': user_message
-            })
+            cache = self._shared_cache()
+            cached = cache.get(user_message) if cache else None
+            if cached is not None:
+                self.context.add('user', user_message)
+                self.context.add('assistant', cached)
+                self.context.compact_async(self.system_prompt)
+                return cached
             
-            # Prepare messages with system prompt
-            messages = [
-                {'role': 'system', 'content': self.system_prompt}
-            ] + self.conversation_history
-            
-            # Get response from Ollama
-            response = ollama.chat(
-                model=self.model_name,
-                messages=messages
-            )
+            with self._slot():
+                # Add user message to history
+                self.context.add('user', user_message)
+                
+                # System prompt and summary of older turns, then the recent turns
+                messages = self.context.messages(self.system_prompt)
+                
+                # Get response from Ollama
+                response = ollama.chat(
+                    model=self.model_name,
+                    messages=messages,
+                    options=self.options
+                )
             
             assistant_message = response['message']['content']
+            if cache:
+                cache.put(user_message, assistant_message)
             
-            # Add assistant response to history
-            self.conversation_history.append({
-                'role': 'assistant',
-                'content': assistant_message
-            })
+            # Add assistant response to history; fold old turns if over budget
+            self.context.add('assistant', assistant_message)
+            self.context.compact_async(self.system_prompt)
             
             return assistant_message
             
+        except Overloaded:
+            return BUSY_MESSAGE
         except Exception as e:
             return f"Error connecting to LLM: {str(e)}"
     
     def reset_conversation(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        self.context.reset()
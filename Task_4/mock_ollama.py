@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOllama(BaseHTTPRequestHandler):
+    """Minimal Ollama HTTP API (/api/chat, /api/generate, /api/embeddings, /api/tags).
+
+    Replies are canned text emitted token by token with a fixed delay, and the server
+    records the peak number of concurrent generations and the order prompts arrived
+    in, so the app and the request scheduler can be exercised under load without a model.
+    """
+    first_token_delay = 0.3
+    token_delay = 0.02
+    tokens = 40
+    active = 0
+    peak = 0
+    served = 0
+    log = []  # last message (or prompt) of each generation, in arrival order
+    lock = threading.Lock()
+
+    @classmethod
+    def reset(cls, first_token_delay=0.3, token_delay=0.02, tokens=40):
+        """Set reply timing and clear the counters"""
+        with cls.lock:
+            cls.first_token_delay = first_token_delay
+            cls.token_delay = token_delay
+            cls.tokens = tokens
+            cls.active = cls.peak = cls.served = 0
+            cls.log = []
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            return self._json({'models': [{'name': 'llama3.1:8b'}]})
+        self._json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path == '/api/embeddings':
+            # deterministic toy vector from the prompt's characters
+            vec = [0.0] * 64
+            for i, ch in enumerate(request.get('prompt', '')):
+                vec[(ord(ch) + i) % 64] += 1.0
+            return self._json({'embedding': vec})
+        if self.path == '/api/generate' and not request.get('prompt'):
+            # model load request (LLMHandler.warm_up)
+            return self._json({'model': request.get('model'), 'response': '', 'done': True})
+        if self.path not in ('/api/chat', '/api/generate'):
+            return self._json({'error': 'not found'}, 404)
+        self._generate(request, chat=self.path == '/api/chat')
+
+    def _generate(self, request, chat):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.log.append(request['messages'][-1]['content'] if chat else request.get('prompt'))
+        try:
+            words = [f"word{i} " for i in range(cls.tokens)]
+            time.sleep(cls.first_token_delay)
+            stamp = datetime.now(timezone.utc).isoformat()
+
+            def part(text, done):
+                body = {'model': request.get('model'), 'created_at': stamp, 'done': done}
+                if chat:
+                    body['message'] = {'role': 'assistant', 'content': text}
+                else:
+                    body['response'] = text
+                return body
+
+            if not request.get('stream', True):
+                time.sleep(cls.token_delay * cls.tokens)
+                return self._json(part(''.join(words), True))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            for w in words:
+                self.wfile.write((json.dumps(part(w, False)) + '\n').encode())
+                self.wfile.flush()
+                time.sleep(cls.token_delay)
+            self.wfile.write((json.dumps(part('', True)) + '\n').encode())
+        finally:
+            with cls.lock:
+                cls.active -= 1
+                cls.served += 1
+
+
+def serve(port=0):
+    """Start the mock on a background thread; port 0 picks a free one (server.server_address[1])"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_test(args):
+    # N concurrent sessions, each with its own LLMHandler, through one scheduler
+    os.environ['OLLAMA_HOST'] = f"http://127.0.0.1:{args.port}"
+    from llm_handler import LLMHandler, BUSY_MESSAGE
+    from scheduler import RequestScheduler
+
+    scheduler = RequestScheduler(args.max_inflight, args.max_queue, args.queue_timeout)
+    results = []
+    lock = threading.Lock()
+
+    def session(i):
+        llm = LLMHandler(scheduler=scheduler, session_id=i)
+        start = time.perf_counter()
+        first = None
+        text = ''
+        for token in llm.chat_stream(f"Question {i} about loans"):
+            first = first or time.perf_counter() - start
+            text += token
+        with lock:
+            results.append((first, time.perf_counter() - start, text == BUSY_MESSAGE))
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.load)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    answered = [r for r in results if not r[2]]
+    shed = len(results) - len(answered)
+    print(f"{len(answered)} answered, {shed} shed; peak concurrent generations on the server: {MockOllama.peak}")
+    if answered:
+        ttft = sorted(r[0] for r in answered)
+        print(f"time to first token: median {statistics.median(ttft):.2f}s, max {ttft[-1]:.2f}s")
+    print(scheduler.stats())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock Ollama server for local testing and load runs')
+    parser.add_argument('--port', type=int, default=11435, help='Port to listen on (point OLLAMA_HOST here)')
+    parser.add_argument('--tokens', type=int, default=40, help='Tokens per reply')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='Seconds between tokens')
+    parser.add_argument('--first-token-delay', type=float, default=0.3, help='Seconds before the first token')
+    parser.add_argument('--load', type=int, default=0, help='Run this many concurrent chat sessions against the mock and exit')
+    parser.add_argument('--max-inflight', type=int, default=2, help='Scheduler slots for --load')
+    parser.add_argument('--max-queue', type=int, default=16, help='Scheduler queue bound for --load')
+    parser.add_argument('--queue-timeout', type=float, default=30.0, help='Scheduler queue timeout for --load')
+    args = parser.parse_args()
+    MockOllama.reset(args.first_token_delay, args.token_delay, args.tokens)
+    server = serve(args.port)
+    if args.load:
+        load_test(args)
+    else:
+        print(f"Mock Ollama listening on http://127.0.0.1:{args.port} (OLLAMA_HOST=http://127.0.0.1:{args.port})")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    server.shutdown()
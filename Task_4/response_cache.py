@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+import ollama
+
+# Turns that lean on earlier messages or on the user's own situation: their answer
+# depends on more than the question text, so they are never served from or stored in the cache.
+PERSONAL = re.compile(r"\b(i|i'm|im|i've|me|my|mine|we|our|us)\b")
+FOLLOW_UP = re.compile(r"\b(it|that|this|those|these|they|them|above|previous|earlier|again|more|else)\b"
+                       r"|^(and|also|so|why|what about|how about)\b")
+DIGITS = re.compile(r"\d")
+# Words that do not change what is being asked; everything else is a content word
+STOP_WORDS = frozenset(
+    "a an the is are was were be been to of for in on at by with from as and or "
+    "what whats s how do does can could should would will which who when where "
+    "there here any some please tell explain about".split()
+)
+
+
+def normalize_prompt(text):
+    """Lowercase, drop punctuation, collapse whitespace"""
+    text = re.sub(r"[^a-z0-9\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_words(text):
+    """Set of words in a normalized prompt that are not stop words"""
+    return frozenset(w for w in text.split() if w not in STOP_WORDS)
+
+
+def hashed_embedding(text, dim=1024):
+    """Bag of words and character trigrams hashed into `dim` buckets, L2-normalized"""
+    vec = np.zeros(dim, dtype=np.float32)
+    words = text.split()
+    padded = f" {text} "
+    for feature in words + [padded[i:i + 3] for i in range(len(padded) - 2)]:
+        vec[zlib.crc32(feature.encode()) % dim] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class ResponseCache:
+    """Answers to standalone finance questions, shared by every chat session.
+
+    A lookup first tries the normalized prompt exactly, then the nearest cached prompt
+    by cosine similarity over a matrix of unit vectors (one matrix-vector product).
+    Embeddings come from an Ollama embedding model when `embed_model` is set, else
+    from hashed words and character trigrams. Trigram vectors score near-opposites
+    alike ("increase" vs "decrease credit score"), so without an embedding model a
+    similar prompt must also have exactly the same content words. Entries expire after `ttl` seconds and
+    the least recently used ones are evicted past `max_entries`.
+    """
+
+    def __init__(self, similarity_threshold=0.85, ttl=24 * 3600, max_entries=5000, embed_model=None):
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed_model = embed_model
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # normalized prompt -> (response, stored_at, row), LRU order
+        self._keys = []  # row -> normalized prompt
+        self._matrix = None  # row -> unit embedding; grown by doubling, first len(_keys) rows live
+        self.metrics = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0, 'skipped': 0,
+                        'evictions': 0, 'expired': 0}
+
+    def _embed(self, text):
+        """(unit vector, True if it is the hashed fallback)"""
+        if self.embed_model:
+            try:
+                vec = np.asarray(ollama.embeddings(model=self.embed_model, prompt=text)['embedding'], dtype=np.float32)
+                return vec / (np.linalg.norm(vec) or 1.0), False
+            except Exception:
+                pass
+        return hashed_embedding(text), True
+
+    def cacheable(self, prompt, history=None):
+        """False for personal or follow-up turns"""
+        text = prompt.lower()
+        if PERSONAL.search(text) or DIGITS.search(text):
+            return False
+        return not (history and FOLLOW_UP.search(text.strip()))
+
+    def get(self, prompt, history=None):
+        """Cached response for a similar standalone prompt, or None"""
+        if not self.cacheable(prompt, history):
+            with self._lock:
+                self.metrics['skipped'] += 1
+            return None
+        key = normalize_prompt(prompt)
+        with self._lock:
+            hit = self._lookup_exact(key)
+            if hit is not None:
+                self.metrics['exact_hits'] += 1
+                return hit
+            empty = not self._keys
+        if empty:
+            return self._miss()
+        vec, hashed = self._embed(key)
+        with self._lock:
+            if not self._keys or self._matrix.shape[1] != len(vec):
+                return self._miss(locked=True)
+            scores = self._matrix[:len(self._keys)] @ vec
+            rows = np.flatnonzero(scores >= self.similarity_threshold)
+            if hashed:
+                words = content_words(key)
+                rows = [r for r in rows if content_words(self._keys[r]) == words]
+            if not len(rows):
+                return self._miss(locked=True)
+            row = max(rows, key=lambda r: scores[r])
+            hit = self._lookup_exact(self._keys[row])
+            if hit is None:
+                return self._miss(locked=True)
+            self.metrics['semantic_hits'] += 1
+            return hit
+
+    def _miss(self, locked=False):
+        if locked:
+            self.metrics['misses'] += 1
+        else:
+            with self._lock:
+                self.metrics['misses'] += 1
+        return None
+
+    def _lookup_exact(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response, stored_at, _ = entry
+        if time.time() - stored_at > self.ttl:
+            self._remove(key)
+            self.metrics['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, prompt, response, history=None):
+        if not response or not self.cacheable(prompt, history):
+            return
+        key = normalize_prompt(prompt)
+        vec, _ = self._embed(key)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self._matrix is None or self._matrix.shape[1] != len(vec):
+                self._matrix = np.empty((64, len(vec)), dtype=np.float32)
+                self._keys = []
+                self._entries.clear()
+            row = len(self._keys)
+            if row == len(self._matrix):
+                self._matrix = np.concatenate([self._matrix, np.empty_like(self._matrix)])
+            self._matrix[row] = vec
+            self._entries[key] = (response, time.time(), row)
+            self._keys.append(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.metrics['evictions'] += 1
+
+    def _remove(self, key):
+        # swap the last row into the freed slot so the matrix stays dense
+        _, _, row = self._entries.pop(key)
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._keys[row] = moved
+            self._matrix[row] = self._matrix[last]
+            response, stored_at, _ = self._entries[moved]
+            self._entries[moved] = (response, stored_at, row)
+        self._keys.pop()
+
+    def stats(self):
+        with self._lock:
+            m = dict(self.metrics)
+            m['entries'] = len(self._entries)
+        lookups = m['exact_hits'] + m['semantic_hits'] + m['misses']
+        m['hit_rate'] = (m['exact_hits'] + m['semantic_hits']) / lookups if lookups else 0.0
+        return m
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+
+class Overloaded(Exception):
+    """The LLM queue is full (or the wait timed out); the request was shed"""
+
+
+class RequestScheduler:
+    """Admission control for LLM generations shared by all chat sessions.
+
+    At most `max_inflight` generations run against Ollama at once. Further requests
+    wait in per-session queues that are served round-robin, so one busy session cannot
+    starve the others. Once `max_queue` requests are waiting, new ones are rejected
+    right away with Overloaded, and a request that waits longer than `queue_timeout`
+    gives up the same way; callers can tell the user to retry instead of hanging.
+
+    The scheduler runs its own asyncio loop on a daemon thread. Streamlit's script
+    threads use the blocking `slot()`, asyncio code can use `async_slot()`.
+    """
+
+    def __init__(self, max_inflight=2, max_queue=32, queue_timeout=60.0):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._waiting = OrderedDict()  # session -> deque of futures, in service order
+        self._depth = 0
+        self._inflight = 0
+        self.metrics = {'granted': 0, 'rejected': 0, 'timed_out': 0, 'max_queue_depth': 0,
+                        'wait_total_s': 0.0, 'wait_max_s': 0.0}
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-scheduler", daemon=True)
+        self._thread.start()
+
+    def _dispatch(self):
+        # grant free slots, taking one request per session in turn
+        while self._inflight < self.max_inflight and self._waiting:
+            session, queue = self._waiting.popitem(last=False)
+            future = queue.popleft()
+            self._depth -= 1
+            if queue:
+                self._waiting[session] = queue
+            if future.done():  # cancelled while waiting
+                continue
+            self._inflight += 1
+            future.set_result(None)
+
+    def _release(self):
+        self._inflight -= 1
+        self._dispatch()
+
+    def _forget(self, session, future):
+        queue = self._waiting.get(session)
+        if queue and future in queue:
+            queue.remove(future)
+            self._depth -= 1
+            if not queue:
+                del self._waiting[session]
+
+    async def _acquire(self, session):
+        if self._inflight < self.max_inflight and not self._waiting:
+            self._inflight += 1
+            self.metrics['granted'] += 1
+            return
+        if self._depth >= self.max_queue:
+            self.metrics['rejected'] += 1
+            raise Overloaded(f"{self._depth} requests already waiting")
+        future = self.loop.create_future()
+        self._waiting.setdefault(session, deque()).append(future)
+        self._depth += 1
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self._depth)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                # granted just as the timer fired: hand the slot back
+                self._release()
+            else:
+                future.cancel()
+                self._forget(session, future)
+            self.metrics['timed_out'] += 1
+            raise Overloaded(f"no free slot within {self.queue_timeout:.0f}s")
+        waited = time.monotonic() - start
+        self.metrics['granted'] += 1
+        self.metrics['wait_total_s'] += waited
+        self.metrics['wait_max_s'] = max(self.metrics['wait_max_s'], waited)
+
+    @asynccontextmanager
+    async def async_slot(self, session):
+        """Hold one generation slot (call from coroutines on any loop)"""
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._acquire(session), self.loop))
+        try:
+            yield
+        finally:
+            self.loop.call_soon_threadsafe(self._release)
+
+    @contextmanager
+    def slot(self, session):
+        """Hold one generation slot (blocking; raises Overloaded when shed)"""
+        asyncio.run_coroutine_threadsafe(self._acquire(session), self.loop).result()
+        try:
+            yield
+        finally:
+            self.loop.call_soon_threadsafe(self._release)
+
+    def stats(self):
+        """Queue depth, in-flight generations and admission counters"""
+        async def snapshot():
+            m = dict(self.metrics)
+            m.update(queue_depth=self._depth, inflight=self._inflight, sessions_waiting=len(self._waiting))
+            return m
+        m = asyncio.run_coroutine_threadsafe(snapshot(), self.loop).result()
+        m['wait_mean_s'] = m['wait_total_s'] / m['granted'] if m['granted'] else 0.0
+        return m
@@ -0,0 +1,48 @@
+import pytest
+
+from response_cache import ResponseCache
+
+# Near-identical wording, opposite meaning: must never share an answer
+DIFFERENT_QUESTIONS = [
+    ("how to increase credit score", "how to decrease credit score"),
+    ("tax on short term capital gains", "tax on long term capital gains"),
+    ("how to open a savings account", "how to close a savings account"),
+    ("is gold a good investment", "is silver a good investment"),
+    ("should you pay off a loan early", "should you pay off a loan late"),
+]
+
+# Same question, different phrasing: served from the cache
+SAME_QUESTIONS = [
+    ("What is a good credit score?", "what's a good credit score"),
+    ("What is the difference between a Roth IRA and a traditional IRA?",
+     "difference between a roth ira and traditional ira"),
+]
+
+
+@pytest.mark.parametrize("stored, asked", DIFFERENT_QUESTIONS)
+def test_opposite_questions_miss(stored, asked):
+    cache = ResponseCache()
+    cache.put(stored, "answer")
+    assert cache.get(asked) is None
+    assert cache.get(stored) == "answer"
+
+
+@pytest.mark.parametrize("stored, asked", SAME_QUESTIONS)
+def test_rephrased_questions_hit(stored, asked):
+    cache = ResponseCache()
+    cache.put(stored, "answer")
+    assert cache.get(asked) == "answer"
+
+
+def test_best_matching_entry_wins():
+    cache = ResponseCache()
+    cache.put("how to increase credit score", "raise it")
+    cache.put("how to decrease credit score", "lower it")
+    assert cache.get("How to increase credit score?") == "raise it"
+    assert cache.get("how to decrease my credit score") is None  # personal, never cached
+
+
+def test_personal_questions_are_not_cached():
+    cache = ResponseCache()
+    cache.put("what should I do with my 5000 dollars", "answer")
+    assert cache.stats()['entries'] == 0
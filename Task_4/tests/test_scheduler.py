@@ -0,0 +1,110 @@
+import threading
+import time
+
+import ollama
+import pytest
+
+from llm_handler import LLMHandler, BUSY_MESSAGE
+from mock_ollama import MockOllama, serve
+from scheduler import RequestScheduler
+
+
+@pytest.fixture
+def mock(monkeypatch):
+    """Mock Ollama on a free port, with the ollama module functions pointed at it"""
+    MockOllama.reset(first_token_delay=0.05, token_delay=0.005, tokens=5)
+    server = serve(0)
+    client = ollama.Client(host=f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(ollama, 'chat', client.chat)
+    monkeypatch.setattr(ollama, 'generate', client.generate)
+    yield MockOllama
+    server.shutdown()
+    server.server_close()
+
+
+def ask(scheduler, session, prompt, replies):
+    llm = LLMHandler(scheduler=scheduler, session_id=session)
+    replies[prompt] = ''.join(llm.chat_stream(prompt))
+
+
+def start(scheduler, session, prompt, replies):
+    thread = threading.Thread(target=ask, args=(scheduler, session, prompt, replies))
+    thread.start()
+    return thread
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_inflight_generations_are_bounded(mock):
+    scheduler = RequestScheduler(max_inflight=2, max_queue=16)
+    replies = {}
+    threads = [start(scheduler, f"s{i}", f"question {i}", replies) for i in range(8)]
+    for t in threads:
+        t.join()
+
+    stats = scheduler.stats()
+    assert mock.peak <= 2
+    assert stats['max_queue_depth'] > 0  # the bound was actually reached
+    assert mock.served == stats['granted'] == 8
+    assert BUSY_MESSAGE not in replies.values()
+
+
+def test_sessions_are_served_round_robin(mock):
+    mock.reset(first_token_delay=0.2, token_delay=0.001, tokens=2)
+    scheduler = RequestScheduler(max_inflight=1, max_queue=16)
+    replies = {}
+    threads = [start(scheduler, 'blocker', 'blocker', replies)]
+    wait_until(lambda: scheduler.stats()['inflight'] == 1)
+    # session A queues three requests before session B queues one
+    for i, (session, prompt) in enumerate([('A', 'A1'), ('A', 'A2'), ('A', 'A3'), ('B', 'B1')], 1):
+        threads.append(start(scheduler, session, prompt, replies))
+        wait_until(lambda: scheduler.stats()['queue_depth'] == i)
+    for t in threads:
+        t.join()
+
+    assert mock.log == ['blocker', 'A1', 'B1', 'A2', 'A3']
+
+
+def test_full_queue_sheds_requests(mock):
+    mock.reset(first_token_delay=0.3, token_delay=0.001, tokens=2)
+    scheduler = RequestScheduler(max_inflight=1, max_queue=2)
+    replies = {}
+    threads = [start(scheduler, 's0', 'running', replies)]
+    wait_until(lambda: scheduler.stats()['inflight'] == 1)
+    threads += [start(scheduler, f"s{i}", f"queued {i}", replies) for i in (1, 2)]
+    wait_until(lambda: scheduler.stats()['queue_depth'] == 2)
+
+    ask(scheduler, 's3', 'overflow', replies)
+    assert replies['overflow'] == BUSY_MESSAGE
+    for t in threads:
+        t.join()
+
+    assert [replies[p] == BUSY_MESSAGE for p in ('running', 'queued 1', 'queued 2')] == [False] * 3
+    assert mock.served == 3
+    assert scheduler.stats()['rejected'] == 1
+
+
+def test_queue_timeout_sheds_requests(mock):
+    mock.reset(first_token_delay=1.0, token_delay=0.001, tokens=2)
+    scheduler = RequestScheduler(max_inflight=1, max_queue=16, queue_timeout=0.2)
+    replies = {}
+    running = start(scheduler, 's0', 'running', replies)
+    wait_until(lambda: scheduler.stats()['inflight'] == 1)
+
+    started = time.monotonic()
+    ask(scheduler, 's1', 'waiting', replies)
+    waited = time.monotonic() - started
+    running.join()
+
+    assert replies['waiting'] == BUSY_MESSAGE
+    assert 0.2 <= waited < 0.9
+    assert replies['running'] != BUSY_MESSAGE
+    stats = scheduler.stats()
+    assert stats['timed_out'] == 1
+    assert stats['queue_depth'] == 0
+    assert mock.log == ['running']